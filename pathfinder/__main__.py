@@ -4,60 +4,251 @@
 #
 # Pathfinder runs a genetic algorithm to control
 #   finders to intercept a target in an environment
-#   while avoiding walls.
+#   while avoiding walls. Run headless experiments with
+#   the run and sweep commands, or watch one with gui.
 """
 
+import argparse
 import time
 
-from graphics import GraphWin, update
-
-from pathfinder.environment import Border, Environment, Target, Wall
+from pathfinder.experiment import (MetricsWriter, run_experiment, run_sweep,
+                                   sweep_configs)
+from pathfinder.live import Simulation
+from pathfinder.maps import MAPS, START_POSITION
 from pathfinder.population import Population
-from pathfinder.vector import Vector
+from pathfinder.recorder import Recorder, list_recordings, replay
+from pathfinder.selection import SELECTIONS
 
 
-def main():
-    # make window to display GUI
-    window = GraphWin("Path Finder", 500, 550, autoflush=False)
+def gui(args):
+    """A function to display a population evolving in a window
 
-    # swerve is a challeneging environment for testing
-    swerve = Environment(
-        border=Border(Vector([20, 20]), Vector([480, 480])),
-        target=Target(Vector([450, 250])),
-        walls=[
-            Wall(Vector([150, 20]), Vector([0, 230])),
-            Wall(Vector([230, 480]), Vector([0, -230])),
-            Wall(Vector([310, 20]), Vector([0, 230]))
-        ]
-    )
+    Args:
+        args (argparse.Namespace): the gui command line arguments
+    """
+    # graphics is only imported once something is displayed
+    from graphics import GraphWin, update
 
-    # simple is an almost empty environment for testing
-    simple = Environment(
-        border=Border(Vector([20, 20]), Vector([480, 480])),
-        target=Target(Vector([450, 250])),
-        walls=[]
-    )
+    from pathfinder.render import FrameRenderer
 
-    # select environment from above and display
-    environment = swerve
-    environment.show(window)
+    # make window to display GUI
+    window = GraphWin("Path Finder", 500, 550, autoflush=False)
+
+    # select an environment from pathfinder.maps and display
+    environment = MAPS[args.env]()
+    if args.geodesic:
+        environment.compile()
+    renderer = FrameRenderer(window)
+    renderer.show_environment(environment)
 
     # define the population
     population = Population(
-        size=35,
-        lifespan=250,
-        start_position=Vector([50, 250]),
-        window=window
+        size=args.size,
+        lifespan=args.lifespan,
+        start_position=START_POSITION,
+        seed=args.seed
     )
 
-    # run the window
+    # run the population in the background, drawing at the frame rate
+    frame_time = 1/args.fps
+    with Simulation(population, environment) as simulation:
+        while(not window.isClosed()):
+            started = time.perf_counter()
+            frame = simulation.take(frame_time)
+            if frame is not None:
+                renderer.draw_frame(frame)
+            # update the window
+            update()
+            # sleep for what is left of the frame
+            time.sleep(max(0, frame_time - (time.perf_counter() - started)))
+
+
+def run(args):
+    """A function to run one configuration headless
+
+    Args:
+        args (argparse.Namespace): the run command line arguments
+    """
+    config = base_config(args)
+    config.update(env=args.env, size=args.size,
+                  mutation_rate=args.mutation_rate, seed=args.seed,
+                  workers=args.workers, record=args.record,
+                  record_select=args.record_select,
+                  record_count=args.record_count, profile=args.profile)
+    with MetricsWriter(args.metrics) as writer:
+        run_experiment(config, writer.write)
+
+
+def replay_recordings(args):
+    """A function to play recorded generations back in a window
+
+    Args:
+        args (argparse.Namespace): the replay command line arguments
+    """
+    from graphics import GraphWin, update
+
+    from pathfinder.render import FrameRenderer
+
+    window = GraphWin("Path Finder", 500, 550, autoflush=False)
+    renderer = FrameRenderer(window)
+    renderer.show_environment(MAPS[args.env]())
+    replay(list_recordings(args.path), renderer, args.fps, update,
+           window.isClosed)
+    # keep the last tick up until the window is closed
     while(not window.isClosed()):
-        # process the population
-        population.run(window, environment)
-        # update the window
         update()
-        # sleep for a short time between frames
-        time.sleep(1/500)
+        time.sleep(1/args.fps)
+
+
+def sweep(args):
+    """A function to run every combination of a grid of configurations
+
+    Args:
+        args (argparse.Namespace): the sweep command line arguments
+    """
+    configs = sweep_configs(base_config(args), args.envs, args.sizes,
+                            args.mutation_rates, args.seed)
+    with MetricsWriter(args.metrics) as writer:
+        run_sweep(configs, writer, args.workers)
+
+
+def base_config(args):
+    """A function to get the settings shared by run and sweep
+
+    Args:
+        args (argparse.Namespace): the command line arguments
+
+    Returns:
+        dict: the shared part of a configuration
+    """
+    return {
+        "lifespan": args.lifespan,
+        "generations": args.generations,
+        "elite": args.elite,
+        "selection": args.selection,
+        "target_completion": args.target_completion,
+        "plateau": args.plateau,
+        "time_budget": args.time_budget,
+        "geodesic": args.geodesic,
+    }
+
+
+def add_experiment_arguments(parser):
+    """A function to add the arguments shared by run and sweep
+
+    Args:
+        parser (argparse.ArgumentParser): the parser to add to
+    """
+    parser.add_argument("--lifespan", type=int, default=250,
+                        help="steps in each finder")
+    parser.add_argument("--generations", type=int, default=100,
+                        help="most generations to run")
+    parser.add_argument("--elite", type=int, default=0,
+                        help="fittest finders carried over unchanged")
+    parser.add_argument("--selection", choices=SELECTIONS,
+                        default="truncation", help="selection operator")
+    parser.add_argument("--target-completion", type=float,
+                        help="stop once this part of a generation completes")
+    parser.add_argument("--plateau", type=int,
+                        help="stop once the best fitness has not improved "
+                             "for this many generations")
+    parser.add_argument("--time-budget", type=float,
+                        help="stop after this many seconds")
+    parser.add_argument("--geodesic", action="store_true",
+                        help="score finders by their distance to the target "
+                             "around walls")
+    parser.add_argument("--seed", type=int, help="root seed")
+    parser.add_argument("--metrics", "-o", default="-",
+                        help="file to write per-generation metrics to, CSV "
+                             "if it ends in .csv, else JSON Lines "
+                             "(default stdout)")
+
+
+def main(argv=None):
+    """A function to run pathfinder from the command line
+
+    Args:
+        argv (list, optional): the command line arguments.
+            Defaults to None, using sys.argv.
+    """
+    parser = argparse.ArgumentParser(
+        prog="pathfinder",
+        description="Evolve finders to reach a target while avoiding walls."
+    )
+    commands = parser.add_subparsers(dest="command")
+
+    gui_parser = commands.add_parser(
+        "gui", help="watch a population evolve (the default)")
+    gui_parser.add_argument("--env", choices=MAPS, default="swerve",
+                            help="environment to run in")
+    gui_parser.add_argument("--size", type=int, default=35,
+                            help="finders in the population")
+    gui_parser.add_argument("--lifespan", type=int, default=250,
+                            help="steps in each finder")
+    gui_parser.add_argument("--geodesic", action="store_true",
+                            help="score finders by their distance to the "
+                                 "target around walls")
+    gui_parser.add_argument("--seed", type=int, help="seed")
+    gui_parser.add_argument("--fps", type=float, default=30,
+                            help="frames drawn per second")
+    gui_parser.set_defaults(handler=gui)
+
+    run_parser = commands.add_parser(
+        "run", help="evolve one configuration headless")
+    run_parser.add_argument("--env", choices=MAPS, default="swerve",
+                            help="environment to run in")
+    run_parser.add_argument("--size", type=int, default=1000,
+                            help="finders in the population")
+    run_parser.add_argument("--mutation-rate", type=float, default=0.05,
+                            help="rate of mutation for children")
+    run_parser.add_argument("--workers", type=int, default=1,
+                            help="processes simulating each generation")
+    run_parser.add_argument("--record", metavar="DIR",
+                            help="directory to record finder paths to, one "
+                                 "file per generation")
+    run_parser.add_argument("--record-select", choices=Recorder.selections,
+                            default="best", help="finders to record")
+    run_parser.add_argument("--record-count", type=int, default=10,
+                            help="finders to record, unless recording all")
+    run_parser.add_argument("--profile", metavar="FILE",
+                            help="file to write the seconds spent in each "
+                                 "phase and the work counted in every "
+                                 "generation to, CSV if it ends in .csv, "
+                                 "else JSON Lines")
+    add_experiment_arguments(run_parser)
+    run_parser.set_defaults(handler=run)
+
+    replay_parser = commands.add_parser(
+        "replay", help="play back paths recorded with run --record")
+    replay_parser.add_argument("path",
+                               help="a recording, or a directory of them")
+    replay_parser.add_argument("--env", choices=MAPS, default="swerve",
+                               help="environment the recording was made in")
+    replay_parser.add_argument("--fps", type=float, default=60,
+                               help="ticks drawn per second")
+    replay_parser.set_defaults(handler=replay_recordings)
+
+    sweep_parser = commands.add_parser(
+        "sweep", help="evolve every combination of environments, sizes "
+                      "and mutation rates")
+    sweep_parser.add_argument("--envs", choices=MAPS, nargs="+",
+                              default=list(MAPS),
+                              help="environments to run in")
+    sweep_parser.add_argument("--sizes", type=int, nargs="+",
+                              default=[1000], help="population sizes")
+    sweep_parser.add_argument("--mutation-rates", type=float, nargs="+",
+                              default=[0.05], help="mutation rates")
+    sweep_parser.add_argument("--workers", type=int,
+                              help="configurations run at once "
+                                   "(default one per core)")
+    add_experiment_arguments(sweep_parser)
+    sweep_parser.set_defaults(handler=sweep)
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        # with no command, keep opening the window as before
+        args = parser.parse_args(["gui"])
+    args.handler(args)
 
 
 if __name__ == "__main__":
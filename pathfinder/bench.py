@@ -0,0 +1,254 @@
+"""
+# bench.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file contains the benchmark suite for the simulation,
+#   collision and breeding hot paths. Run it with
+#   python -m pathfinder.bench, results are written as JSON
+#   so runs of different versions can be compared.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+
+import numpy as np
+
+from pathfinder.chromosome import Chromosome
+from pathfinder.environment import Wall
+from pathfinder.maps import MAPS, START_POSITION
+from pathfinder.population import Population
+from pathfinder.seeding import seed
+from pathfinder.vector import Vector
+
+SEED = 481
+
+
+def time_call(function, repeat=5, number=None):
+    """A function to time a callable
+
+    Args:
+        function (callable): the function to time
+        repeat (int, optional): the number of timing runs. Defaults to 5.
+        number (int, optional): the calls per timing run. Defaults to None,
+            picking enough calls for each run to take about 0.2 seconds.
+
+    Returns:
+        dict: the best and mean seconds per call, and the calls timed
+    """
+    timer = timeit.Timer(function)
+    if number is None:
+        number, _ = timer.autorange()
+    runs = [total / number for total in timer.repeat(repeat, number)]
+    return {
+        "best": min(runs),
+        "mean": sum(runs) / len(runs),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+class Mover:
+    """A stand-in for a finder, holding just a position and velocity"""
+
+    def __init__(self, position, velocity):
+        """Mover constructor
+
+        Args:
+            position (Vector): the position of the mover
+            velocity (Vector): the velocity of the mover
+        """
+        self.position = position
+        self.velocity = velocity
+
+
+def bench_vector(repeat):
+    """A function to benchmark Vector arithmetic
+
+    Args:
+        repeat (int): the number of timing runs
+
+    Returns:
+        dict: the timings by name
+    """
+    a, b = Vector([3.0, 4.0]), Vector([1.0, 2.0])
+
+    def in_place():
+        c = Vector(a)
+        c += b
+        c *= 2.0
+
+    return {
+        "vector.add": time_call(lambda: a + b, repeat),
+        "vector.sub": time_call(lambda: a - b, repeat),
+        "vector.mul": time_call(lambda: a * 2.0, repeat),
+        "vector.in_place": time_call(in_place, repeat),
+        "vector.normalize": time_call(lambda: Vector(a).normalize(), repeat),
+        "vector.distance_from": time_call(lambda: a.distance_from(b), repeat),
+        "vector.sub_magnitude": time_call(lambda: (a - b).magnitude(), repeat),
+    }
+
+
+def bench_collision(repeat):
+    """A function to benchmark Wall and Environment collision tests
+
+    Args:
+        repeat (int): the number of timing runs
+
+    Returns:
+        dict: the timings by name
+    """
+    results = {}
+    wall = Wall(Vector([150, 20]), Vector([0, 230]))
+    crossing = Mover(Vector([140, 100]), Vector([20, 0]))
+    missing = Mover(Vector([140, 300]), Vector([20, 0]))
+    results["wall.test_collision.hit"] = time_call(
+        lambda: wall.test_collision(crossing), repeat)
+    results["wall.test_collision.miss"] = time_call(
+        lambda: wall.test_collision(missing), repeat)
+    rng = np.random.default_rng(SEED)
+    for name, make_map in MAPS.items():
+        environment = make_map()
+        results[f"environment.test_collision.{name}"] = time_call(
+            lambda: environment.test_collision(missing), repeat)
+        positions = rng.uniform(20, 480, (10000, 2))
+        velocities = rng.normal(0, 5, (10000, 2))
+        results[f"environment.test_collision_batch.{name}.10000"] = time_call(
+            lambda: environment.test_collision_batch(positions, velocities),
+            repeat)
+    return results
+
+
+def bench_breeding(repeat, lifespan=250):
+    """A function to benchmark crossover and mutation
+
+    Args:
+        repeat (int): the number of timing runs
+        lifespan (int, optional): the genes in each chromosome.
+            Defaults to 250.
+
+    Returns:
+        dict: the timings by name
+    """
+    seed(SEED)
+    first = Chromosome(lifespan=lifespan)
+    second = Chromosome(lifespan=lifespan)
+    return {
+        f"chromosome.crossover.{lifespan}": time_call(
+            lambda: first.crossover(second), repeat),
+        f"chromosome.get_mutation.{lifespan}": time_call(
+            lambda: first.get_mutation(0.05), repeat),
+    }
+
+
+def bench_population(repeat, sizes, lifespans):
+    """A function to benchmark breeding and whole generations
+
+    Args:
+        repeat (int): the number of timing runs
+        sizes (list): the population sizes to run
+        lifespans (list): the lifespans to run
+
+    Returns:
+        dict: the timings by name, generations also report finder-steps/sec
+    """
+    results = {}
+    for name, make_map in MAPS.items():
+        environment = make_map()
+        for size in sizes:
+            for lifespan in lifespans:
+                key = f"{name}.{size}.{lifespan}"
+                population = Population(size, lifespan, START_POSITION,
+                                        seed=SEED)
+                population.evaluate_generation(environment)
+                results[f"population.step.{key}"] = time_call(
+                    lambda: population.step(environment), repeat, number=1)
+                # one generation per timing run, counting the steps taken
+                population = Population(size, lifespan, START_POSITION,
+                                        seed=SEED)
+                timings, finder_steps = [], 0
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    population.evaluate_generation(environment)
+                    timings.append(time.perf_counter() - start)
+                    finder_steps += int(
+                        population.engine.alive_durations.sum())
+                    population.breed()
+                results[f"generation.{key}"] = {
+                    "best": min(timings),
+                    "mean": sum(timings) / len(timings),
+                    "number": 1,
+                    "repeat": repeat,
+                    "finder_steps_per_sec": finder_steps / sum(timings),
+                }
+    return results
+
+
+def run(repeat=5, sizes=(100, 1000, 10000), lifespans=(100, 250)):
+    """A function to run every benchmark
+
+    Args:
+        repeat (int, optional): the number of timing runs. Defaults to 5.
+        sizes (tuple, optional): the population sizes for generation
+            benchmarks. Defaults to (100, 1000, 10000).
+        lifespans (tuple, optional): the lifespans for generation
+            benchmarks. Defaults to (100, 250).
+
+    Returns:
+        dict: the benchmark results and the platform they were run on
+    """
+    results = {}
+    results.update(bench_vector(repeat))
+    results.update(bench_collision(repeat))
+    results.update(bench_breeding(repeat))
+    results.update(bench_population(repeat, sizes, lifespans))
+    return {
+        "seed": SEED,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def main(argv=None):
+    """A function to run the benchmarks from the command line
+
+    Args:
+        argv (list, optional): the command line arguments.
+            Defaults to None, using sys.argv.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m pathfinder.bench",
+        description="Time the simulation, collision and breeding hot paths."
+    )
+    parser.add_argument("--output", "-o", default="-",
+                        help="file to write JSON results to (default stdout)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="timing runs per benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[100, 1000, 10000],
+                        help="population sizes for generation benchmarks")
+    parser.add_argument("--lifespans", type=int, nargs="+",
+                        default=[100, 250],
+                        help="lifespans for generation benchmarks")
+    args = parser.parse_args(argv)
+    report = run(args.repeat, args.sizes, args.lifespans)
+    for name, timing in report["results"].items():
+        line = f"{name:<52} {timing['best'] * 1e6:>14.2f} us"
+        if "finder_steps_per_sec" in timing:
+            line += f"  {timing['finder_steps_per_sec']:>14,.0f} steps/s"
+        print(line, file=sys.stderr)
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+# cache.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file contains the caches that save simulation work
+#   between generations. The trajectory cache keeps points
+#   along each finder's path, so a child only needs to be
+#   simulated from where it first differs from its parent.
+#   The fitness cache skips genomes that were seen before.
+"""
+
+import hashlib
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+
+from pathfinder.engine import Engine
+
+
+def shared_prefix(genomes, others):
+    """A function to find how many leading genes two stacks of genomes share
+
+    Args:
+        genomes (np.ndarray): a (size, lifespan, 2) genome matrix
+        others (np.ndarray): a (size, lifespan, 2) genome matrix
+
+    Returns:
+        np.ndarray: the (size,) index of the first differing gene of each
+            pair, or lifespan if the genomes are the same
+    """
+    differs = genomes[..., 0] != others[..., 0]
+    differs |= genomes[..., 1] != others[..., 1]
+    first = differs.argmax(axis=1)
+    rows = np.arange(len(first))
+    return np.where(differs[rows, first], first, genomes.shape[1])
+
+
+class LRUCache:
+    def __init__(self, capacity):
+        """LRUCache constructor
+
+        Args:
+            capacity (int): the most entries to keep, weighed by
+                LRUCache.weigh. The least recently used entries are
+                dropped to make room.
+        """
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def weigh(self, entry):
+        """A function to get how much of the capacity an entry takes
+
+        Args:
+            entry (object): the entry to weigh
+
+        Returns:
+            int: the weight of the entry, 1 for every entry here
+        """
+        return 1
+
+    def get(self, key):
+        """A function to look up an entry, marking it as recently used
+
+        Args:
+            key (object): the key of the entry
+
+        Returns:
+            object: the entry, or None if it is not cached
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        """A function to add an entry, dropping old entries if full
+
+        An entry heavier than the whole capacity is not kept.
+
+        Args:
+            key (object): the key of the entry
+            entry (object): the entry to keep
+        """
+        if key in self.entries:
+            self.weight -= self.weigh(self.entries.pop(key))
+        weight = self.weigh(entry)
+        if weight > self.capacity:
+            warnings.warn(f"an entry of weight {weight} does not fit a "
+                          f"cache of capacity {self.capacity}",
+                          RuntimeWarning, stacklevel=2)
+            return
+        self.entries[key] = entry
+        self.weight += weight
+        while self.weight > self.capacity:
+            _, dropped = self.entries.popitem(last=False)
+            self.weight -= self.weigh(dropped)
+
+    def clear(self):
+        """A function to drop every entry"""
+        self.entries.clear()
+        self.weight = 0
+
+
+class TrajectoryCache(LRUCache):
+    def __init__(self, every=10, capacity=100000):
+        """TrajectoryCache constructor
+
+        Each entry holds a batch of finders' positions, velocities and
+        accelerations after every k steps while they were alive, and how
+        their runs ended. The state after c steps only depends on the
+        first c genes, so a child can resume from the last checkpoint
+        before its first gene that differs from its parent. A child that
+        only differs after its parent had stopped simply ends the same way.
+
+        Args:
+            every (int, optional): the steps between checkpoints.
+                Defaults to 10.
+            capacity (int, optional): the most finders to keep, whole
+                batches are dropped to make room. Defaults to 100000.
+        """
+        super().__init__(capacity)
+        self.every = every
+        self.steps_saved = 0
+
+    def weigh(self, entry):
+        return len(entry[1])
+
+    def setup(self, start_position, environment):
+        """A function to get what the batch keys are scoped to
+
+        Trajectories only hold for the walls and start they were run
+        with, so a cache shared between environments keeps them apart.
+
+        Args:
+            start_position (Vector): a vector describing the start position
+            environment (Environment): the Environment the genomes run in
+
+        Returns:
+            tuple: the environment's fingerprint and the start position
+        """
+        return (environment.fingerprint(), start_position.x(),
+                start_position.y())
+
+    def evaluate(self, genomes, key, start_position, environment,
+                 parents=(), prefixes=None, metrics=None):
+        """A function to simulate a batch of genomes, resuming from parents
+
+        Args:
+            genomes (np.ndarray): a (size, lifespan, 2) genome matrix
+            key (object): the key to cache the batch's trajectories under
+            start_position (Vector): a vector describing the start position
+            environment (Environment): an Environment to run the genomes in
+            parents (list, optional): a tuple for every batch of parents,
+                holding the batch's key, the rows of the genomes bred from
+                it and the rows of their parents in it. Defaults to (),
+                simulating every genome from the start.
+            prefixes (np.ndarray, optional): the number of leading genes
+                each genome shares with its parent, from shared_prefix.
+                Defaults to None.
+            metrics (Metrics, optional): the metrics to time the steps
+                into. Defaults to None, keeping none.
+
+        Returns:
+            np.ndarray: the (size,) fitness of the genomes
+        """
+        engine = Engine(genomes, start_position, metrics=metrics)
+        setup = self.setup(start_position, environment)
+        every = self.every
+        history = np.zeros((engine.lifespan // every + 1, engine.size, 3, 2))
+        recorded = np.zeros(engine.size, dtype=int)
+        for parent, children, rows in parents:
+            entry = self.get((setup, parent))
+            if entry is not None:
+                self.resume(engine, history, recorded, entry,
+                            children, rows, prefixes[children])
+        engine.update_active()
+        while not engine.finished():
+            engine.step(environment)
+            # keep a checkpoint of finders still alive every k steps
+            due = engine.active[engine.steps[engine.active] % every == 0]
+            checkpoints = engine.steps[due] // every
+            history[checkpoints, due, 0] = engine.positions[due]
+            history[checkpoints, due, 1] = engine.velocities[due]
+            history[checkpoints, due, 2] = engine.accelerations[due]
+            recorded[due] = checkpoints
+        fitness = engine.calculate_fitness(environment)
+        self.put((setup, key), (history, recorded, engine.positions,
+                       engine.alive_durations, engine.crashed,
+                       engine.completed))
+        return fitness
+
+    def resume(self, engine, history, recorded, entry, children, rows,
+               prefixes):
+        """A function to start finders from their parents' checkpoints
+
+        Args:
+            engine (Engine): the engine to set the state of, after a reset
+            history (np.ndarray): the checkpoints of the engine's finders
+            recorded (np.ndarray): the number of checkpoints of each finder
+            entry (tuple): the cached batch of parents
+            children (np.ndarray): the rows of the finders to resume
+            rows (np.ndarray): the rows of their parents in the entry
+            prefixes (np.ndarray): the genes each finder shares with its
+                parent
+        """
+        (parent_history, parent_recorded, positions, alive_durations,
+         crashed, completed) = entry
+        # the checkpoints made before the first differing gene
+        counts = np.minimum(parent_recorded[rows], prefixes // self.every)
+        history[:, children] = parent_history[:, rows]
+        recorded[children] = counts
+        # children of parents that stopped before the genomes differ
+        # end the same way
+        stopped = prefixes >= alive_durations[rows] - 1
+        finished, parents = children[stopped], rows[stopped]
+        engine.positions[finished] = positions[parents]
+        engine.alive_durations[finished] = alive_durations[parents]
+        engine.steps[finished] = engine.lifespan + 1
+        engine.crashed[finished] = crashed[parents]
+        engine.completed[finished] = completed[parents]
+        self.steps_saved += int(alive_durations[parents].sum())
+        # the rest pick up from their last shared checkpoint
+        resumed = ~stopped & (counts > 0)
+        counts, parents = counts[resumed], rows[resumed]
+        children = children[resumed]
+        engine.positions[children] = parent_history[counts, parents, 0]
+        engine.velocities[children] = parent_history[counts, parents, 1]
+        engine.accelerations[children] = parent_history[counts, parents, 2]
+        engine.alive_durations[children] = counts * self.every
+        engine.steps[children] = counts * self.every
+        self.steps_saved += int(counts.sum()) * self.every
+
+
+class FitnessCache(LRUCache):
+    def __init__(self, capacity=100000):
+        """FitnessCache constructor
+
+        Fitness is kept by a hash of the genome's genes, the start
+        position and the environment's fingerprint, so a genome is only
+        simulated once in a given setup.
+
+        Args:
+            capacity (int, optional): the most genomes to keep.
+                Defaults to 100000.
+        """
+        super().__init__(capacity)
+
+    def keys(self, genomes, start_position, environment):
+        """A function to make the cache key of every genome
+
+        Args:
+            genomes (np.ndarray): a (size, lifespan, 2) genome matrix
+            start_position (Vector): a vector describing the start position
+            environment (Environment): the Environment the genomes run in
+
+        Returns:
+            list: the key of each genome
+        """
+        setup = hashlib.blake2b(digest_size=16)
+        setup.update(environment.fingerprint().encode())
+        setup.update(np.array([start_position.x(), start_position.y()],
+                              dtype=float).tobytes())
+        setup.update(str(genomes.dtype).encode())
+        genomes = np.ascontiguousarray(genomes)
+        keys = []
+        for genome in genomes:
+            digest = setup.copy()
+            digest.update(genome)
+            keys.append(digest.digest())
+        return keys
+
+    def evaluate(self, genomes, start_position, environment, simulate):
+        """A function to get the fitness of genomes, simulating only new ones
+
+        Args:
+            genomes (np.ndarray): a (size, lifespan, 2) genome matrix
+            start_position (Vector): a vector describing the start position
+            environment (Environment): the Environment the genomes run in
+            simulate (callable): a function taking a genome matrix and
+                returning the fitness of its genomes
+
+        Returns:
+            np.ndarray: the (size,) fitness of the genomes
+        """
+        keys = self.keys(genomes, start_position, environment)
+        fitness = np.empty(len(keys))
+        # the rows of each genome not cached, duplicates simulate once
+        missing = {}
+        for row, key in enumerate(keys):
+            if key in missing:
+                missing[key].append(row)
+                self.hits += 1
+                continue
+            value = self.get(key)
+            if value is None:
+                missing[key] = [row]
+            else:
+                fitness[row] = value
+        if missing:
+            rows = [duplicates[0] for duplicates in missing.values()]
+            values = simulate(genomes[rows])
+            for (key, duplicates), value in zip(missing.items(), values):
+                fitness[duplicates] = value
+                self.put(key, float(value))
+        return fitness
@@ -0,0 +1,222 @@
+"""
+# checkpoint.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file handles saving and loading populations as .npz
+#   checkpoints, and writing checkpoints from a background
+#   thread so a run never waits on the disk. Memory-mapped
+#   arrays stay in their own .npy files next to the checkpoint.
+"""
+
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+
+
+def write_checkpoint(path, snapshot, compress=False):
+    """A function to write a checkpoint, replacing any older one at once
+
+    Memory-mapped arrays are flushed to their own files, which must be
+    in the checkpoint's directory, and the checkpoint only names them.
+    Files the replaced checkpoint named are removed once it is gone.
+
+    Args:
+        path (str): the file to write
+        snapshot (dict): the arrays to store, from Population.snapshot
+        compress (bool, optional): whether to compress the arrays.
+            Defaults to False.
+    """
+    arrays = {}
+    for name, array in snapshot.items():
+        if isinstance(array, np.memmap):
+            array.flush()
+            arrays[f"{name}_file"] = np.array(os.path.basename(array.filename))
+        else:
+            arrays[name] = array
+    replaced = mapped_files(path) if os.path.exists(path) else []
+    temporary_path = f"{path}.tmp"
+    save = np.savez_compressed if compress else np.savez
+    with open(temporary_path, "wb") as file:
+        save(file, **arrays)
+    os.replace(temporary_path, path)
+    kept = mapped_files(path)
+    for file_path in replaced:
+        if file_path not in kept:
+            remove_file(file_path)
+
+
+def mapped_files(path):
+    """A function to find the memory-mapped files a checkpoint names
+
+    Args:
+        path (str): the checkpoint
+
+    Returns:
+        list: the paths of the files
+    """
+    directory = os.path.dirname(path)
+    try:
+        with np.load(path) as checkpoint:
+            return [os.path.join(directory, str(checkpoint[name]))
+                    for name in checkpoint.files if name.endswith("_file")]
+    except (OSError, ValueError):
+        return []  # unreadable, nothing to clean up
+
+
+def remove_file(path):
+    """A function to remove a file that may already be gone
+
+    Args:
+        path (str): the file to remove
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def discard_snapshot(snapshot):
+    """A function to remove the files of a snapshot that was not written
+
+    Args:
+        snapshot (dict): the arrays of the snapshot
+    """
+    for array in snapshot.values():
+        if isinstance(array, np.memmap):
+            remove_file(array.filename)
+
+
+def read_checkpoint(path):
+    """A function to read a checkpoint
+
+    Arrays kept in their own files are opened read-only as memory maps,
+    so they are read as they are used.
+
+    Args:
+        path (str): the file to read
+
+    Returns:
+        dict: the stored arrays
+    """
+    directory = os.path.dirname(path)
+    arrays = {}
+    with np.load(path) as checkpoint:
+        for name in checkpoint.files:
+            if name.endswith("_file"):
+                arrays[name[:-len("_file")]] = np.load(
+                    os.path.join(directory, str(checkpoint[name])),
+                    mmap_mode="r")
+            else:
+                arrays[name] = checkpoint[name]
+    return arrays
+
+
+def rng_to_array(rng):
+    """A function to store the state of a generator in an array
+
+    Args:
+        rng (np.random.Generator): the generator to store
+
+    Returns:
+        np.ndarray: the state of the generator as a JSON string
+    """
+    return np.array(json.dumps(rng.bit_generator.state))
+
+
+def rng_from_array(array):
+    """A function to rebuild a generator from a stored state
+
+    Args:
+        array (np.ndarray): the state from rng_to_array
+
+    Returns:
+        np.random.Generator: the generator, continuing where it left off
+    """
+    state = json.loads(str(array))
+    bit_generator = getattr(np.random, state["bit_generator"])()
+    bit_generator.state = state
+    return np.random.Generator(bit_generator)
+
+
+class Checkpointer:
+    def __init__(self, path, every=10):
+        """Checkpointer constructor
+
+        A checkpointer is called with the population after each
+        generation, see Population.run_generations. Snapshots are copied
+        on the calling thread and written on a background thread. If the
+        disk falls behind, only the newest waiting snapshot is written.
+
+        Args:
+            path (str): the file to write checkpoints to
+            every (int, optional): the number of generations between
+                checkpoints. Defaults to 10.
+        """
+        self.path = path
+        self.every = every
+        self.pending = queue.Queue(maxsize=1)
+        self.error = None
+        self.thread = threading.Thread(target=self.write_loop, daemon=True)
+        self.thread.start()
+
+    def __call__(self, population):
+        """A function to checkpoint a population if one is due
+
+        Args:
+            population (Population): the population to checkpoint
+        """
+        if self.error is not None:
+            raise self.error
+        if population.generation % self.every == 0:
+            self.submit(population.snapshot(self.path))
+
+    def submit(self, snapshot):
+        """A function to queue a snapshot for writing
+
+        Args:
+            snapshot (dict): the arrays to store, from Population.snapshot
+        """
+        while True:
+            try:
+                self.pending.put_nowait(snapshot)
+                return
+            except queue.Full:
+                # drop the older snapshot that is still waiting
+                try:
+                    discard_snapshot(self.pending.get_nowait())
+                except queue.Empty:
+                    pass
+
+    def write_loop(self):
+        """A function to write snapshots as they arrive, run by the thread"""
+        while True:
+            snapshot = self.pending.get()
+            if snapshot is None:
+                return
+            try:
+                write_checkpoint(self.path, snapshot)
+            except Exception as error:
+                # keep the error for the caller and keep draining, so
+                # nothing waiting on the queue is left blocked
+                self.error = error
+
+    def close(self):
+        """A function to finish writing and stop the background thread"""
+        while self.thread.is_alive():
+            try:
+                self.pending.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -3,77 +3,151 @@
 # Martin Miglio
 #
 # This class handles the genetic processing, including
-#   the crossover and mutation functions.
+#   the crossover and mutation functions. The genome
+#   functions below breed a whole (size, lifespan, 2)
+#   genome matrix at once.
 """
 
-import random
+import numpy as np
 
-from pathfinder.vector import Vector
+from pathfinder.seeding import get_rng
+from pathfinder.vector import Vector, make_random_vectors
+
+
+def normalize_genes(genes):
+    """A function to normalize every gene of an array of genes
+
+    Args:
+        genes (np.ndarray): an array of genes, with x and y in the last axis
+
+    Returns:
+        np.ndarray: the genes scaled to unit length, zero genes are kept
+    """
+    norms = np.hypot(genes[..., 0], genes[..., 1])[..., np.newaxis]
+    return np.divide(genes, norms, out=genes.copy(), where=norms != 0)
+
+
+def random_genomes(size, lifespan, magnitude=1, rng=None):
+    """A function to create random genomes
+
+    Args:
+        size (int): the number of genomes
+        lifespan (int): the number of genes in each genome
+        magnitude (int, optional): the magnitude of every gene. Defaults to 1.
+        rng (np.random.Generator, optional): the generator to draw from.
+            Defaults to None, using the default generator.
+
+    Returns:
+        np.ndarray: a (size, lifespan, 2) genome matrix
+    """
+    return magnitude * normalize_genes(
+        make_random_vectors((size, lifespan), rng))
+
+
+def crossover_genomes(firsts, seconds, rng=None):
+    """A function to crossover two stacks of genomes, pair by pair
+
+    Each child takes the genes up to a random split index from the
+    second genome and the rest from the first, matching
+    Chromosome.crossover.
+
+    Args:
+        firsts (np.ndarray): a (size, lifespan, 2) genome matrix
+        seconds (np.ndarray): a (size, lifespan, 2) genome matrix
+        rng (np.random.Generator, optional): the generator to draw from.
+            Defaults to None, using the default generator.
+
+    Returns:
+        np.ndarray: the (size, lifespan, 2) crossedover genome matrix
+    """
+    size, lifespan = firsts.shape[0], firsts.shape[1]
+    # picks random midpoints
+    split_indices = get_rng(rng).integers(1, lifespan, size, endpoint=True)
+    from_first = np.arange(lifespan) > split_indices[:, np.newaxis]
+    return np.where(from_first[..., np.newaxis], firsts, seconds)
+
+
+def mutate_genomes(genomes, rate=0.5, magnitude=1, rng=None):
+    """A function to mutate a stack of genomes in place
+
+    Args:
+        genomes (np.ndarray): a (size, lifespan, 2) genome matrix
+        rate (float, optional): the rate of mutation. Defaults to 0.5.
+        magnitude (int, optional): the magnitude of mutated genes.
+            Defaults to 1.
+        rng (np.random.Generator, optional): the generator to draw from.
+            Defaults to None, using the default generator.
+
+    Returns:
+        np.ndarray: the mutated genome matrix
+    """
+    rng = get_rng(rng)
+    mask = rng.random(genomes.shape[:-1]) < rate
+    random_genes = make_random_vectors((np.count_nonzero(mask),), rng)
+    # average the old genes with random ones
+    genomes[mask] = magnitude * normalize_genes(
+        (random_genes + genomes[mask]) / 2)
+    return genomes
 
 
 class Chromosome:
-    def __init__(self, genes=None, lifespan=None, magnitude=1):
+    def __init__(self, genes=None, lifespan=None, magnitude=1, rng=None):
         """Chromosome constructor
 
         Args:
-            genes (Chromosome, optional): the genetic information to start
-                with. Defaults to None.
+            genes (np.ndarray OR list, optional): the genetic information to
+                start with, as a (lifespan, 2) array or a list of vectors.
+                Defaults to None.
             lifespan (int, optional): the number of steps to hold information
                 for. Defaults to None.
             magnitude (int, optional): the maximum magnitude for genetic
                 information. Defaults to 1.
+            rng (np.random.Generator, optional): the generator to draw
+                random genes from. Defaults to None, using the default
+                generator.
         """
         # Recieves genes and create a dna object
         self.magnitude = magnitude
         if genes is not None:
-            self.genes = genes
+            if len(genes) > 0 and isinstance(genes[0], Vector):
+                genes = [gene.value for gene in genes]
+            self.genes = np.asarray(genes, dtype=float).reshape(-1, 2)
         # If no genes just create random dna
         else:
-            self.genes = []
-            for _ in range(lifespan):
-                # Gives random vector
-                random_vector = Vector(random=True).normalize()
-                self.genes.append(magnitude*random_vector)
+            self.genes = random_genomes(1, lifespan, magnitude, rng)[0]
 
-    def crossover(self, partner):
+    def crossover(self, partner, rng=None):
         """A function to crossover two chromosomes
 
         Args:
             partner (Chromosome): another Chromosome object
+            rng (np.random.Generator, optional): the generator to draw from.
+                Defaults to None, using the default generator.
 
         Returns:
             Chromosome: the crossedover chromosome
         """
-        # Performs a crossover with another member of the species
-        newgenes = []
         # Picks random midpoint
-        split_index = random.randint(1, len(self.genes))
-        for index in range(len(self.genes)):
-            if index > split_index:
-                newgenes.append(self.genes[index])
-            else:
-                newgenes.append(partner.genes[index])
+        split_index = get_rng(rng).integers(1, len(self.genes), endpoint=True)
+        newgenes = np.concatenate(
+            (partner.genes[:split_index + 1], self.genes[split_index + 1:]))
         # Gives DNA object an array
         return Chromosome(genes=newgenes, magnitude=self.magnitude)
 
-    def get_mutation(self, rate=0.5):
+    def get_mutation(self, rate=0.5, rng=None):
         """A function to get a mutated chromosome
 
         Args:
             rate (float, optional): the rate of mutation. Defaults to 0.5.
+            rng (np.random.Generator, optional): the generator to draw from.
+                Defaults to None, using the default generator.
 
         Returns:
             Chromosome: the mutated chromosome
         """
         # Adds random mutation to the genes to add variance.
-        mutated_genes = []
-        for i in range(len(self.genes)):
-            adjrand = random.random()
-            if adjrand < rate:
-                mutated_genes.append(
-                    self.magnitude * Vector(random=True).average_with(self.genes[i]).normalize())
-            else:
-                mutated_genes.append(self.genes[i])
+        mutated_genes = mutate_genomes(
+            self.genes[np.newaxis].copy(), rate, self.magnitude, rng)[0]
         return Chromosome(genes=mutated_genes, magnitude=self.magnitude)
 
     def get_value(self, index):
@@ -85,4 +159,4 @@ class Chromosome:
         Returns:
             Vector: the vector stored at index in the chromosome's genes
         """
-        return self.genes[index]
+        return Vector(self.genes[index])
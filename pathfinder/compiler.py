@@ -0,0 +1,361 @@
+"""
+# compiler.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file compiles an environment's static geometry into
+#   grids: the cells walls pass through, the cells a short
+#   movement can not crash from, and the distance from every
+#   cell to the target going around walls. Compiled grids are
+#   cached on disk by the environment's geometry.
+"""
+
+import hashlib
+import heapq
+import math
+import os
+import zipfile
+
+import numpy as np
+
+from pathfinder.checkpoint import write_checkpoint
+
+# bump when the compiled grids change, so old cache files are not used
+VERSION = 2
+# stands for the default cache directory, see default_cache_dir
+DEFAULT_CACHE_DIR = object()
+# the cells a finder can move to from a cell, and the cost of each move
+NEIGHBORS = [(-1, 0, 1.0), (1, 0, 1.0), (0, -1, 1.0), (0, 1, 1.0),
+             (-1, -1, math.sqrt(2)), (-1, 1, math.sqrt(2)),
+             (1, -1, math.sqrt(2)), (1, 1, math.sqrt(2))]
+
+
+class CompiledEnvironment:
+    # the compiled grids stored in a cache file
+    arrays = ("origin", "cell_size", "occupied", "clear", "distance")
+
+    def __init__(self, origin, cell_size, occupied, clear, distance):
+        """CompiledEnvironment constructor
+
+        Use compile_environment rather than making one directly.
+
+        Args:
+            origin (np.ndarray): the (x, y) corner of the first cell
+            cell_size (float): the width and height of every cell
+            occupied (np.ndarray): a (rows, columns) mask of the cells
+                walls pass through
+            clear (np.ndarray): a (rows, columns) mask of the cells a
+                movement of at most one cell can not crash from
+            distance (np.ndarray): the (rows, columns) distance from every
+                cell to the target, going around walls
+        """
+        self.origin = np.asarray(origin, dtype=float)
+        self.cell_size = float(cell_size)
+        self.occupied = occupied
+        self.clear = clear
+        self.distance = distance
+
+    def cells(self, positions):
+        """A function to find the cell of each position, clipped to the grid
+
+        Args:
+            positions (np.ndarray): a (N, 2) array of positions
+
+        Returns:
+            tuple: the row and column of each position
+        """
+        rows, columns = self.distance.shape
+        scaled = (positions - self.origin) / self.cell_size
+        np.clip(scaled, 0, (columns - 1, rows - 1), out=scaled)
+        indices = scaled.astype(int)
+        return indices[:, 1], indices[:, 0]
+
+    def lookup_distance(self, positions):
+        """A function to look up the distance to the target of positions
+
+        Args:
+            positions (np.ndarray): a (N, 2) array of positions
+
+        Returns:
+            np.ndarray: the (N,) distance of each position's cell
+        """
+        row, column = self.cells(positions)
+        return self.distance[row, column]
+
+    def is_occupied(self, positions):
+        """A function to find the positions in cells walls pass through
+
+        Args:
+            positions (np.ndarray): a (N, 2) array of positions
+
+        Returns:
+            np.ndarray: a (N,) mask of the positions in occupied cells
+        """
+        row, column = self.cells(positions)
+        return self.occupied[row, column]
+
+    def free_neighbors(self, positions, reach=2):
+        """A function to find the free cells around positions
+
+        Args:
+            positions (np.ndarray): a (N, 2) array of positions
+            reach (int, optional): the cells to look in every direction.
+                Defaults to 2.
+
+        Returns:
+            tuple: the (N, K, 2) centres of the K cells around each
+                position, and their (N, K) distance to the target, inf
+                for occupied cells and cells off the grid
+        """
+        rows, columns = self.distance.shape
+        row, column = self.cells(positions)
+        steps = np.arange(-reach, reach + 1)
+        row_steps, column_steps = np.meshgrid(steps, steps, indexing="ij")
+        near_rows = row[:, np.newaxis] + row_steps.ravel()
+        near_columns = column[:, np.newaxis] + column_steps.ravel()
+        inside = ((near_rows >= 0) & (near_rows < rows)
+                  & (near_columns >= 0) & (near_columns < columns))
+        near_rows = np.clip(near_rows, 0, rows - 1)
+        near_columns = np.clip(near_columns, 0, columns - 1)
+        distance = np.where(
+            inside & ~self.occupied[near_rows, near_columns],
+            self.distance[near_rows, near_columns], np.inf)
+        centers = self.origin + (np.stack((near_columns, near_rows), axis=-1)
+                                 + 0.5) * self.cell_size
+        return centers, distance
+
+    def can_not_crash(self, positions, velocities):
+        """A function to find movements that can not hit any wall
+
+        A movement of at most one cell along each axis stays within the
+        cells around its start, so it can not crash if no wall passes near
+        them. Movements this can not rule out still have to be tested.
+
+        Args:
+            positions (np.ndarray): a (N, 2) array of finder positions
+            velocities (np.ndarray): a (N, 2) array of finder velocities
+
+        Returns:
+            np.ndarray: a (N,) mask of movements that are sure not to crash
+        """
+        row, column = self.cells(positions)
+        short = np.abs(velocities).max(axis=1) <= self.cell_size
+        # positions outside the grid land on its edge, which is never clear
+        return short & self.clear[row, column]
+
+    def save(self, path):
+        """A function to write the compiled grids to a .npz file
+
+        Args:
+            path (str): the file to write
+        """
+        write_checkpoint(path, {name: np.asarray(getattr(self, name))
+                                for name in self.arrays}, compress=True)
+
+    @classmethod
+    def load(cls, path):
+        """A function to read compiled grids from a .npz file
+
+        Args:
+            path (str): the file to read
+
+        Returns:
+            CompiledEnvironment: the compiled grids
+        """
+        with np.load(path) as compiled:
+            return cls(*(compiled[name] for name in cls.arrays))
+
+
+def geometry_key(environment, cell_size):
+    """A function to identify compiled grids by what they are built from
+
+    Args:
+        environment (Environment): the environment being compiled
+        cell_size (float): the width and height of every cell
+
+    Returns:
+        str: a digest of the walls, target and cell size
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(environment.wall_matrix.tobytes())
+    digest.update(np.array([environment.target.position.x(),
+                            environment.target.position.y(),
+                            environment.target.radius, cell_size, VERSION],
+                           dtype=float).tobytes())
+    return digest.hexdigest()
+
+
+def rasterize(wall_matrix, origin, cell_size, shape):
+    """A function to mark the cells walls pass through
+
+    Each wall is sampled every quarter of a cell, so a cell a wall only
+    clips may be missed but one of its neighbours is always marked.
+
+    Args:
+        wall_matrix (np.ndarray): a (W, 4) array of walls as x1, y1, x2, y2
+        origin (np.ndarray): the (x, y) corner of the first cell
+        cell_size (float): the width and height of every cell
+        shape (tuple): the rows and columns of the grid
+
+    Returns:
+        np.ndarray: a (rows, columns) mask of the cells walls pass through
+    """
+    occupied = np.zeros(shape, dtype=bool)
+    for x1, y1, x2, y2 in wall_matrix:
+        samples = int(np.ceil(np.hypot(x2 - x1, y2 - y1) / cell_size * 4)) + 1
+        steps = np.linspace(0, 1, samples)
+        points = np.column_stack((x1 + steps * (x2 - x1),
+                                  y1 + steps * (y2 - y1)))
+        cells = np.floor((points - origin) / cell_size).astype(int)
+        columns = np.clip(cells[:, 0], 0, shape[1] - 1)
+        rows = np.clip(cells[:, 1], 0, shape[0] - 1)
+        occupied[rows, columns] = True
+    return occupied
+
+
+def dilate(mask, cells):
+    """A function to grow a mask by a number of cells in every direction
+
+    Args:
+        mask (np.ndarray): a (rows, columns) boolean mask
+        cells (int): the cells to grow by
+
+    Returns:
+        np.ndarray: the grown mask
+    """
+    padded = np.pad(mask, cells)
+    grown = np.zeros_like(mask)
+    rows, columns = mask.shape
+    for row in range(2 * cells + 1):
+        for column in range(2 * cells + 1):
+            grown |= padded[row:row + rows, column:column + columns]
+    return grown
+
+
+def distance_field(occupied, origin, cell_size, target, radius):
+    """A function to find the distance from every cell to the target
+
+    Distances spread out from the cells within the target with
+    Dijkstra's algorithm, moving to the 8 neighbouring cells but never
+    cutting the corner of a wall. Cells walls pass through get a
+    distance but are not passed through. That distance may come from
+    either side of the wall, so Environment.distance_to_target does not
+    use it for positions that can reach a free cell. Cells that can not
+    reach the target get the largest distance found.
+
+    Args:
+        occupied (np.ndarray): a (rows, columns) mask of the cells walls
+            pass through
+        origin (np.ndarray): the (x, y) corner of the first cell
+        cell_size (float): the width and height of every cell
+        target (np.ndarray): the (x, y) centre of the target
+        radius (float): the radius of the target
+
+    Returns:
+        np.ndarray: the (rows, columns) distance from every cell
+    """
+    rows, columns = occupied.shape
+    distance = np.full(occupied.shape, np.inf)
+    # the cells within the target start at their centre's distance
+    centers_y, centers_x = np.indices(occupied.shape) + 0.5
+    offsets = np.hypot(origin[0] + centers_x * cell_size - target[0],
+                       origin[1] + centers_y * cell_size - target[1])
+    seeds = (offsets <= radius) & ~occupied
+    if not seeds.any():
+        row, column = np.unravel_index(np.argmin(offsets), offsets.shape)
+        seeds[row, column] = True
+    distance[seeds] = offsets[seeds]
+    queue = [(offsets[row, column], row, column)
+             for row, column in zip(*np.nonzero(seeds))]
+    heapq.heapify(queue)
+    while queue:
+        current, row, column = heapq.heappop(queue)
+        if current > distance[row, column] or occupied[row, column]:
+            continue
+        for row_step, column_step, cost in NEIGHBORS:
+            next_row, next_column = row + row_step, column + column_step
+            if not (0 <= next_row < rows and 0 <= next_column < columns):
+                continue
+            # diagonal moves can not squeeze between wall cells
+            if row_step and column_step and (
+                    occupied[row, next_column] or occupied[next_row, column]):
+                continue
+            next_distance = current + cost * cell_size
+            if next_distance < distance[next_row, next_column]:
+                distance[next_row, next_column] = next_distance
+                heapq.heappush(queue, (next_distance, next_row, next_column))
+    reached = np.isfinite(distance)
+    distance[~reached] = distance[reached].max()
+    return distance
+
+
+def build(environment, cell_size):
+    """A function to compile an environment's grids
+
+    Args:
+        environment (Environment): the environment to compile
+        cell_size (float): the width and height of every cell
+
+    Returns:
+        CompiledEnvironment: the compiled grids
+    """
+    points = environment.wall_matrix.reshape(-1, 2)
+    target = environment.target.position.value
+    points = np.vstack((points, target[np.newaxis]))
+    origin = points.min(axis=0) - cell_size
+    extent = points.max(axis=0) + cell_size - origin
+    columns, rows = np.ceil(extent / cell_size).astype(int) + 1
+    occupied = rasterize(environment.wall_matrix, origin, cell_size,
+                         (rows, columns))
+    # a wall crossing the cells around a cell is marked within two cells
+    # of them, see rasterize
+    clear = ~dilate(occupied, 2)
+    clear[[0, -1], :] = clear[:, [0, -1]] = False
+    distance = distance_field(occupied, origin, cell_size, target,
+                              environment.target.radius)
+    return CompiledEnvironment(origin, cell_size, occupied, clear, distance)
+
+
+def default_cache_dir():
+    """A function to get the directory compiled grids are cached in
+
+    Returns:
+        str: $PATHFINDER_CACHE, or ~/.cache/pathfinder if it is not set
+    """
+    return os.environ.get(
+        "PATHFINDER_CACHE",
+        os.path.join(os.path.expanduser("~"), ".cache", "pathfinder"))
+
+
+def compile_environment(environment, cell_size=5.0,
+                        cache_dir=DEFAULT_CACHE_DIR):
+    """A function to compile an environment, reusing cached grids
+
+    Args:
+        environment (Environment): the environment to compile
+        cell_size (float, optional): the width and height of every cell.
+            Defaults to 5.0.
+        cache_dir (str, optional): the directory compiled grids are cached
+            in. Defaults to default_cache_dir, read on every call, None to
+            always compile.
+
+    Returns:
+        CompiledEnvironment: the compiled grids
+    """
+    if cache_dir is DEFAULT_CACHE_DIR:
+        cache_dir = default_cache_dir()
+    if cache_dir is None:
+        return build(environment, cell_size)
+    path = os.path.join(cache_dir,
+                        f"{geometry_key(environment, cell_size)}.npz")
+    if os.path.exists(path):
+        try:
+            return CompiledEnvironment.load(path)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            pass  # unreadable, compile it again
+    compiled = build(environment, cell_size)
+    os.makedirs(cache_dir, exist_ok=True)
+    # processes compiling at once each write their own file first
+    own_path = f"{path}.{os.getpid()}"
+    compiled.save(own_path)
+    os.replace(own_path, path)
+    return compiled
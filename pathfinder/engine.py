@@ -0,0 +1,250 @@
+"""
+# engine.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file contains the batch simulation engine. The state
+#   of a whole population is kept in numpy arrays so every
+#   finder can be advanced one step with a few array operations.
+"""
+
+import numpy as np
+
+from pathfinder.metrics import NullMetrics
+
+
+class Engine:
+    # the diagonal of the environment area
+    max_distance = 1.414*500
+
+    def __init__(self, genomes, start_position, min_alive_fraction=0.0,
+                 metrics=None):
+        """Engine constructor
+
+        Args:
+            genomes (np.ndarray): a (size, lifespan, 2) array holding the
+                acceleration for every finder at every step
+            start_position (Vector): a vector describing the start position
+            min_alive_fraction (float, optional): the part of the finders
+                that has to be moving for a run to go on, the rest are
+                left where they are. Defaults to 0.0, running until every
+                finder has stopped.
+            metrics (Metrics, optional): the metrics to time the steps
+                into. Defaults to None, keeping none and skipping the
+                timing altogether.
+        """
+        self.genomes = genomes
+        self.min_alive_fraction = min_alive_fraction
+        if metrics is None:
+            metrics = NullMetrics()
+        self.metrics = metrics
+        # checked once per step, so NullMetrics cost nothing per phase
+        self.profiled = metrics.enabled
+        self.size, self.lifespan = genomes.shape[0], genomes.shape[1]
+        self.start_position = np.array(
+            [start_position.x(), start_position.y()], dtype=float)
+        self.reset()
+
+    @classmethod
+    def from_chromosomes(cls, chromosomes, start_position):
+        """A function to create an engine from a list of chromosomes
+
+        Args:
+            chromosomes (list): the chromosomes to simulate
+            start_position (Vector): a vector describing the start position
+
+        Returns:
+            Engine: the engine holding the chromosomes
+        """
+        genomes = np.array(
+            [chromosome.genes for chromosome in chromosomes], dtype=float
+        ).reshape(len(chromosomes), -1, 2)
+        return cls(genomes, start_position)
+
+    def reset(self):
+        """A function to put every finder back at the start position"""
+        self.positions = np.tile(self.start_position, (self.size, 1))
+        self.velocities = np.zeros((self.size, 2))
+        self.accelerations = np.zeros((self.size, 2))
+        self.alive_durations = np.zeros(self.size, dtype=int)
+        self.steps = np.zeros(self.size, dtype=int)
+        self.crashed = np.zeros(self.size, dtype=bool)
+        self.completed = np.zeros(self.size, dtype=bool)
+        self.fitness = np.zeros(self.size)
+        # the finders still moving, and those that stopped last step
+        self.active = np.arange(self.size)
+        self.stopped = np.zeros(0, dtype=int)
+
+    def update_active(self):
+        """A function to rebuild the active finders from their state
+
+        Call after crashing or completing finders outside of step.
+        """
+        self.active = np.flatnonzero(self.alive())
+
+    def alive(self):
+        """A function to get which finders are still moving
+
+        Returns:
+            np.ndarray: a (size,) boolean mask of live finders
+        """
+        return ~(self.crashed | self.completed)
+
+    def alive_count(self):
+        """A function to count the finders that are still moving
+
+        Returns:
+            int: the number of live finders
+        """
+        return self.size - np.count_nonzero(self.crashed | self.completed)
+
+    def finished(self):
+        """A function to test if a run is over
+
+        Returns:
+            bool: true once no finders are moving, or fewer than
+                min_alive_fraction of them
+        """
+        count = self.active.size
+        return count == 0 or count < self.min_alive_fraction * self.size
+
+    def step(self, environment, indices=None):
+        """A function to advance finders by one step
+
+        Args:
+            environment (Environment): an environment to update the finders in
+            indices (np.ndarray, optional): the finders to advance.
+                Defaults to None, advancing the active finders and
+                dropping those that stop from them.
+
+        Returns:
+            np.ndarray: the indices of the finders that moved this step
+        """
+        tracking = indices is None
+        if tracking:
+            indices = self.active
+        # if out of steps in chromosome, crash the finder, finders that
+        # completed keep their result however long the others run
+        stopped = self.crashed[indices] | self.completed[indices]
+        expired = indices[~stopped & (self.steps[indices] >= self.lifespan)]
+        self.crashed[expired] = True
+        moving = indices[~(self.crashed[indices] | self.completed[indices])]
+        if moving.size > 0 and self.profiled:
+            metrics = self.metrics
+            with metrics.timer("physics"):
+                positions = self.move(moving)
+            with metrics.timer("collision"):
+                self.collide(environment, moving, positions)
+            with metrics.timer("completion"):
+                self.complete(environment, moving, positions)
+            metrics.count("collision_tests", moving.size)
+        elif moving.size > 0:
+            positions = self.move(moving)
+            self.collide(environment, moving, positions)
+            self.complete(environment, moving, positions)
+        if self.profiled:
+            self.metrics.count("finder_steps", indices.size)
+        self.steps[indices] += 1
+        alive = ~(self.crashed[moving] | self.completed[moving])
+        self.stopped = np.concatenate((expired, moving[~alive]))
+        if tracking:
+            self.active = moving[alive]
+        return moving
+
+    def move(self, moving):
+        """A function to update the physics of moving finders
+
+        Args:
+            moving (np.ndarray): the indices of the finders to move
+
+        Returns:
+            np.ndarray: the (N, 2) new positions of the finders
+        """
+        self.alive_durations[moving] += 1
+        self.positions[moving] += self.velocities[moving]
+        self.velocities[moving] += self.accelerations[moving]
+        self.accelerations[moving] = self.genomes[moving, self.steps[moving]]
+        return self.positions[moving]
+
+    def collide(self, environment, moving, positions):
+        """A function to crash the finders that hit a wall
+
+        Args:
+            environment (Environment): an environment to test the finders in
+            moving (np.ndarray): the indices of the finders that moved
+            positions (np.ndarray): the (N, 2) positions of the finders
+        """
+        self.crashed[moving] = environment.test_collision_batch(
+            positions, self.velocities[moving])
+
+    def complete(self, environment, moving, positions):
+        """A function to complete the finders that reached the target
+
+        Args:
+            environment (Environment): an environment to test the finders in
+            moving (np.ndarray): the indices of the finders that moved
+            positions (np.ndarray): the (N, 2) positions of the finders
+        """
+        self.completed[moving] = environment.test_finish_batch(positions)
+
+    def run(self, environment, observer=None):
+        """A function to advance the active finders until the run is over
+
+        Finders crash once they run out of steps, so this takes at most
+        lifespan + 1 steps.
+
+        Args:
+            environment (Environment): an environment to update the finders in
+            observer (callable, optional): a function called with the
+                engine after every step, such as Recorder.capture.
+                Defaults to None.
+
+        Returns:
+            int: the number of steps taken
+        """
+        steps = 0
+        while not self.finished():
+            self.step(environment)
+            steps += 1
+            if observer is not None:
+                observer(self)
+        return steps
+
+    def calculate_fitness(self, environment):
+        """A function to calculate every finder's fitness
+
+        Args:
+            environment (Environment): An environment to calculate the
+                fitness from
+
+        Returns:
+            np.ndarray: the (size,) fitness of the finders
+        """
+        with self.metrics.timer("fitness"):
+            distance_to_target = environment.distance_to_target(
+                self.positions, self.completed)
+            # inverse proportionality to distance
+            fitness = self.max_distance/distance_to_target
+            # proportionality to duration
+            fitness += self.alive_durations/self.lifespan
+            fitness -= 2 * self.crashed  # crashed, take away fitness
+            fitness += 10 * self.completed  # finished, add fitness
+        self.fitness = fitness
+        return fitness
+
+    @classmethod
+    def completion_threshold(cls, environment):
+        """A function to get the fitness that tells completed finders apart
+
+        A finder that completed is within the target radius and gets 10
+        more, so scores at least max_distance/radius + 8. Any other finder
+        scores less than max_distance/radius + 1.
+
+        Args:
+            environment (Environment): the environment fitness was
+                calculated in
+
+        Returns:
+            float: a fitness above every finder that did not complete and
+                below every finder that did
+        """
+        return cls.max_distance/environment.target.radius + 4.5
@@ -6,12 +6,62 @@
 # Collision tracking and drawing are handled here.
 """
 
-from graphics import Circle, Line, Point
+import hashlib
 
+import numpy as np
+
+from pathfinder.compiler import DEFAULT_CACHE_DIR, compile_environment
+from pathfinder.spatial import WallGrid
 from pathfinder.vector import Vector
 
 
+def ccw(A, B, C):
+    """A function to test the orientation of three points
+
+    Works on single points as well as on broadcastable arrays of
+    points, with x and y in the last axis.
+
+    Args:
+        A (np.ndarray): the first point(s)
+        B (np.ndarray): the second point(s)
+        C (np.ndarray): the third point(s)
+
+    Returns:
+        bool OR np.ndarray: true where the points are counterclockwise
+    """
+    return ((C[..., 1]-A[..., 1]) * (B[..., 0]-A[..., 0])
+            > (B[..., 1]-A[..., 1]) * (C[..., 0]-A[..., 0]))
+
+
+def intersects(A, B, C, D):
+    """A function to test if segment AB crosses segment CD
+
+    Works on single points as well as on broadcastable arrays of
+    points, with x and y in the last axis.
+
+    Args:
+        A (np.ndarray): the start point(s) of the first segment
+        B (np.ndarray): the end point(s) of the first segment
+        C (np.ndarray): the start point(s) of the second segment
+        D (np.ndarray): the end point(s) of the second segment
+
+    Returns:
+        bool OR np.ndarray: true where the segments cross
+    """
+    # math from https://bryceboe.com/2006/10/23/line-segment-intersection-algorithm/
+    return ((ccw(A, C, D) != ccw(B, C, D))
+            & (ccw(A, B, C) != ccw(A, B, D)))
+
+
 class Environment:
+    # above this many walls, collision goes through the wall grid
+    grid_threshold = 16
+    # the number of finder-wall pairs tested per broadcast
+    dense_block = 16384
+    # whether compiled environments skip testing movements far from walls,
+    #   off as the batched tests measured about as fast without it
+    precheck = False
+
     def __init__(self, border, target, walls=[]):
         """Environment constructor
 
@@ -24,6 +74,125 @@ class Environment:
         self.border = border
         self.target = target
         self.walls = walls
+        self.index_walls()
+
+    def index_walls(self):
+        """A function to precompute the wall geometry used for collision
+
+        Call again after changing the walls or border of the environment.
+        """
+        walls = self.border.walls + list(self.walls)
+        self.all_walls = walls
+        # one row of x1, y1, x2, y2 per wall, border walls included
+        self.wall_matrix = np.array(
+            [[wall.position.x(), wall.position.y(),
+              wall.position.x() + wall.vector.x(),
+              wall.position.y() + wall.vector.y()] for wall in walls],
+            dtype=float
+        ).reshape(-1, 4)
+        self.grid = WallGrid(self.wall_matrix)
+        # the compiled grids no longer match the walls
+        self.compiled = None
+
+    def compile(self, cell_size=5.0, cache_dir=DEFAULT_CACHE_DIR):
+        """A function to precompute the environment's grids
+
+        Once compiled, fitness measures the distance to the target going
+        around walls instead of straight through them, and with precheck
+        on, collision skips the exact test for movements far from every
+        wall.
+
+        Args:
+            cell_size (float, optional): the width and height of every
+                cell. Defaults to 5.0.
+            cache_dir (str, optional): the directory compiled grids are
+                cached in, see compile_environment.
+
+        Returns:
+            CompiledEnvironment: the compiled grids
+        """
+        self.compiled = compile_environment(self, cell_size, cache_dir)
+        return self.compiled
+
+    def fingerprint(self):
+        """A function to identify the environment by what affects fitness
+
+        Two environments with the same walls, border and target have the
+        same fingerprint, so results in one hold for the other.
+
+        Returns:
+            str: a digest of the wall geometry and target
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.wall_matrix.tobytes())
+        digest.update(np.array([self.target.position.x(),
+                                self.target.position.y(),
+                                self.target.radius], dtype=float).tobytes())
+        if self.compiled is not None:
+            # compiled fitness goes around walls
+            digest.update(b"compiled")
+            digest.update(np.array(self.compiled.cell_size).tobytes())
+        return digest.hexdigest()
+
+    def distance_to_target(self, positions, completed=None):
+        """A function to get how far finders are from the target
+
+        Uncompiled, this is the straight line distance. Compiled, it is
+        the distance going around walls, never less than the straight
+        line, and finders that completed keep the straight line distance
+        so they still score above every other finder. Finders in a cell
+        a wall passes through are measured from the free cells they can
+        see, so the far side of the wall does not count.
+
+        Args:
+            positions (np.ndarray): a (N, 2) array of finder positions
+            completed (np.ndarray, optional): a (N,) mask of the finders
+                that completed. Defaults to None.
+
+        Returns:
+            np.ndarray: the (N,) distance of each finder
+        """
+        offset = positions - self.target.position.value
+        distance = np.hypot(offset[:, 0], offset[:, 1])
+        if self.compiled is None:
+            return distance
+        around = self.compiled.lookup_distance(positions)
+        walled = np.flatnonzero(self.compiled.is_occupied(positions))
+        if walled.size > 0:
+            around[walled] = self.distance_around_walls(
+                positions[walled], around[walled])
+        around = np.maximum(distance, around)
+        if completed is None:
+            return around
+        return np.where(completed, distance, around)
+
+    def distance_around_walls(self, positions, fallback):
+        """A function to measure positions next to walls from their side
+
+        Each position goes to the free cells around it that no wall
+        separates it from, and takes the shortest distance through one.
+
+        Args:
+            positions (np.ndarray): a (N, 2) array of positions in cells
+                walls pass through
+            fallback (np.ndarray): the (N,) distance of positions that
+                see no free cell
+
+        Returns:
+            np.ndarray: the (N,) distance of each position
+        """
+        centers, distance = self.compiled.free_neighbors(positions)
+        count, cells = distance.shape
+        starts = np.repeat(positions, cells, axis=0)
+        moves = centers.reshape(-1, 2) - starts
+        blocked = self.test_collision_walls(starts, moves).reshape(
+            count, cells)
+        distance = np.where(
+            blocked, np.inf,
+            distance + np.hypot(moves[:, 0], moves[:, 1]).reshape(
+                count, cells))
+        nearest = distance.min(axis=1)
+        return np.where(np.isfinite(nearest), nearest, fallback)
 
     def test_finish(self, other):
         """A function to test finish
@@ -39,12 +208,149 @@ class Environment:
         Args:
             other (Finder): A finder to test collision with
         """
-        if len(self.walls) > 0:
-            w_collsions = any([w.test_collision(other) for w in self.walls])
-        else:
-            w_collsions = False
-        border_collision = self.border.test_collision(other)
-        return w_collsions or border_collision
+        return self.test_collision_at(other.position, other.velocity)
+
+    def test_collision_at(self, position, velocity):
+        """A function to test collision for a single movement
+
+        Args:
+            position (Vector): the position the movement starts at
+            velocity (Vector): the velocity of the movement
+        """
+        if len(self.wall_matrix) > self.grid_threshold:
+            return bool(self.test_collision_grid(
+                position.value[np.newaxis], velocity.value[np.newaxis])[0])
+        for wall in self.all_walls:
+            if wall.test_movement(position, velocity):
+                return True
+        return False
+
+    def test_finish_at(self, position):
+        """A function to test finish for a single position
+
+        Args:
+            position (Vector): the position to test
+        """
+        return self.target.test_finish_at(position)
+
+    def test_finish_batch(self, positions):
+        """A function to test finish for many finders at once
+
+        Args:
+            positions (np.ndarray): a (N, 2) array of finder positions
+
+        Returns:
+            np.ndarray: a (N,) boolean mask of finished finders
+        """
+        return self.target.test_finish_batch(positions)
+
+    def test_collision_batch(self, positions, velocities):
+        """A function to test collision for many finders at once
+
+        Small maps test every finder against every wall with one
+        broadcast, maps with many walls go through the wall grid. With
+        precheck on, compiled environments skip the movements far from
+        every wall.
+
+        Args:
+            positions (np.ndarray): a (N, 2) array of finder positions
+            velocities (np.ndarray): a (N, 2) array of finder velocities
+
+        Returns:
+            np.ndarray: a (N,) boolean mask of crashed finders
+        """
+        if self.precheck and self.compiled is not None:
+            # only test the movements the grid can not rule out
+            near = np.flatnonzero(
+                ~self.compiled.can_not_crash(positions, velocities))
+            collisions = np.zeros(len(positions), dtype=bool)
+            if near.size > 0:
+                collisions[near] = self.test_collision_walls(
+                    positions[near], velocities[near])
+            return collisions
+        return self.test_collision_walls(positions, velocities)
+
+    def test_collision_walls(self, positions, velocities):
+        """A function to test many finders against the walls
+
+        Args:
+            positions (np.ndarray): a (N, 2) array of finder positions
+            velocities (np.ndarray): a (N, 2) array of finder velocities
+
+        Returns:
+            np.ndarray: a (N,) boolean mask of crashed finders
+        """
+        if len(self.wall_matrix) > self.grid_threshold:
+            return self.test_collision_grid(positions, velocities)
+        return self.test_collision_dense(positions, velocities)
+
+    def test_collision_dense(self, positions, velocities):
+        """A function to test many finders against every wall at once
+
+        Args:
+            positions (np.ndarray): a (N, 2) array of finder positions
+            velocities (np.ndarray): a (N, 2) array of finder velocities
+
+        Returns:
+            np.ndarray: a (N,) boolean mask of crashed finders
+        """
+        collisions = np.empty(len(positions), dtype=bool)
+        # work in blocks of finders so the (W, block) temporaries stay
+        # small enough to be reused from cache
+        block = max(1, self.dense_block // max(1, len(self.wall_matrix)))
+        for start in range(0, len(positions), block):
+            stop = start + block
+            collisions[start:stop] = self.intersect_walls(
+                positions[start:stop], velocities[start:stop])
+        return collisions
+
+    def intersect_walls(self, positions, velocities):
+        """A function to test finders against every wall with one broadcast
+
+        Args:
+            positions (np.ndarray): a (N, 2) array of finder positions
+            velocities (np.ndarray): a (N, 2) array of finder velocities
+
+        Returns:
+            np.ndarray: a (N,) boolean mask of crashed finders
+        """
+        # the same orientation tests as intersects, broadcasting (W, 1)
+        # walls AB against (N,) finder segments CD so the long axis is
+        # the inner one, and sharing the differences between the tests
+        A_x, A_y, B_x, B_y = np.split(self.wall_matrix, 4, axis=1)
+        C_x, C_y = positions[:, 0], positions[:, 1]
+        D_x, D_y = C_x + velocities[:, 0], C_y + velocities[:, 1]
+        AB_x, AB_y = B_x - A_x, B_y - A_y
+        AC_x, AC_y = C_x - A_x, C_y - A_y
+        AD_x, AD_y = D_x - A_x, D_y - A_y
+        BC_x, BC_y = C_x - B_x, C_y - B_y
+        BD_x, BD_y = D_x - B_x, D_y - B_y
+        ccw_ACD = AD_y * AC_x > AC_y * AD_x
+        ccw_BCD = BD_y * BC_x > BC_y * BD_x
+        ccw_ABC = AC_y * AB_x > AB_y * AC_x
+        ccw_ABD = AD_y * AB_x > AB_y * AD_x
+        hits = (ccw_ACD != ccw_BCD) & (ccw_ABC != ccw_ABD)
+        return hits.any(axis=0)
+
+    def test_collision_grid(self, positions, velocities):
+        """A function to test many finders against nearby walls only
+
+        Args:
+            positions (np.ndarray): a (N, 2) array of finder positions
+            velocities (np.ndarray): a (N, 2) array of finder velocities
+
+        Returns:
+            np.ndarray: a (N,) boolean mask of crashed finders
+        """
+        ends = positions + velocities
+        # only test the walls in the cells each movement passes through
+        finders, walls = self.grid.query(positions, ends)
+        wall_matrix = self.wall_matrix[walls]
+        hits = intersects(wall_matrix[:, 0:2], wall_matrix[:, 2:4],
+                          positions[finders], ends[finders])
+        collisions = np.zeros(len(positions), dtype=bool)
+        collisions[finders[hits]] = True
+        return collisions
 
     def show(self, window):
         """A function to display a border
@@ -67,11 +373,7 @@ class Target:
         """
         self.position = position
         self.radius = 20
-        self.shape = Circle(
-            Point(self.position.x(), self.position.y()),
-            self.radius
-        )
-        self.shape.setFill('green')
+        self.shape = None
 
     def test_finish(self, other):
         """A function to test finish
@@ -79,7 +381,28 @@ class Target:
         Args:
             other (Finder): A finder to test collision with
         """
-        return self.position.distance_from(other.position) <= self.radius
+        return self.test_finish_at(other.position)
+
+    def test_finish_at(self, position):
+        """A function to test finish for a single position
+
+        Args:
+            position (Vector): the position to test
+        """
+        return self.position.distance_from(position) <= self.radius
+
+    def test_finish_batch(self, positions):
+        """A function to test finish for many finders at once
+
+        Args:
+            positions (np.ndarray): a (N, 2) array of finder positions
+
+        Returns:
+            np.ndarray: a (N,) boolean mask of finished finders
+        """
+        offset = positions - self.position.value
+        return (offset[:, 0]*offset[:, 0] + offset[:, 1]*offset[:, 1]
+                <= self.radius*self.radius)
 
     def show(self, window):
         """A function to display a border
@@ -87,8 +410,25 @@ class Target:
         Args:
             window (GraphWin): window to add target to
         """
+        # graphics is only imported once something is displayed
+        from graphics import Circle, Point
+        self.shape = Circle(
+            Point(self.position.x(), self.position.y()),
+            self.radius
+        )
+        self.shape.setFill('green')
         self.shape.draw(window)
 
+    def __getstate__(self):
+        """A function to get the state to pickle, leaving out graphics
+
+        Returns:
+            dict: the state of the target
+        """
+        state = self.__dict__.copy()
+        state["shape"] = None
+        return state
+
 
 class Border:
     def __init__(self, top_left, bottom_right):
@@ -127,6 +467,21 @@ class Border:
         collisions = [wall.test_collision(other) for wall in self.walls]
         return any(collisions)
 
+    def test_collision_batch(self, positions, velocities):
+        """A function to test collision for many finders at once
+
+        Args:
+            positions (np.ndarray): a (N, 2) array of finder positions
+            velocities (np.ndarray): a (N, 2) array of finder velocities
+
+        Returns:
+            np.ndarray: a (N,) boolean mask of crashed finders
+        """
+        collisions = np.zeros(len(positions), dtype=bool)
+        for wall in self.walls:
+            collisions |= wall.test_collision_batch(positions, velocities)
+        return collisions
+
     def show(self, window):
         """A function to display a border
 
@@ -154,14 +509,41 @@ class Wall:
         Args:
             other (Finder): A finder to test collision with
         """
+        return self.test_movement(other.position, other.velocity)
+
+    def test_movement(self, position, velocity):
+        """A function to test collision for a single movement
+
+        Args:
+            position (Vector): the position the movement starts at
+            velocity (Vector): the velocity of the movement
+        """
         # math from https://bryceboe.com/2006/10/23/line-segment-intersection-algorithm/
-        def ccw(A, B, C):
-            return (C.y()-A.y()) * (B.x()-A.x()) > (B.y()-A.y()) * (C.x()-A.x())
-        A = self.position
-        B = self.position + self.vector
-        C = other.position
-        D = other.position + other.velocity
-        return ccw(A, C, D) != ccw(B, C, D) and ccw(A, B, C) != ccw(A, B, D)
+        # on plain floats, so no vectors are made
+        def ccw(A_x, A_y, B_x, B_y, C_x, C_y):
+            return (C_y-A_y) * (B_x-A_x) > (B_y-A_y) * (C_x-A_x)
+        A_x, A_y = self.position.x(), self.position.y()
+        B_x, B_y = A_x + self.vector.x(), A_y + self.vector.y()
+        C_x, C_y = position.x(), position.y()
+        D_x, D_y = C_x + velocity.x(), C_y + velocity.y()
+        return (ccw(A_x, A_y, C_x, C_y, D_x, D_y)
+                != ccw(B_x, B_y, C_x, C_y, D_x, D_y)
+                and ccw(A_x, A_y, B_x, B_y, C_x, C_y)
+                != ccw(A_x, A_y, B_x, B_y, D_x, D_y))
+
+    def test_collision_batch(self, positions, velocities):
+        """A function to test collision for many finders at once
+
+        Args:
+            positions (np.ndarray): a (N, 2) array of finder positions
+            velocities (np.ndarray): a (N, 2) array of finder velocities
+
+        Returns:
+            np.ndarray: a (N,) boolean mask of finders crossing the wall
+        """
+        A = self.position.value
+        return intersects(A, A + self.vector.value,
+                          positions, positions + velocities)
 
     def show(self, window, width=5, fill='black'):
         """A function to display a wall
@@ -171,6 +553,8 @@ class Wall:
             width (int, optional): width of wall in px. Defaults to 5.
             fill (str, optional): color of wall. Defaults to 'black'.
         """
+        # graphics is only imported once something is displayed
+        from graphics import Line, Point
         self.shape = Line(
             Point(self.position.x(), self.position.y()),
             Point(self.position.x() + self.vector.x(),
@@ -179,3 +563,13 @@ class Wall:
         self.shape.setWidth(width)
         self.shape.setFill(fill)
         self.shape.draw(window)
+
+    def __getstate__(self):
+        """A function to get the state to pickle, leaving out graphics
+
+        Returns:
+            dict: the state of the wall
+        """
+        state = self.__dict__.copy()
+        state["shape"] = None
+        return state
@@ -0,0 +1,204 @@
+"""
+# experiment.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file runs headless experiments, one configuration or
+#   a sweep over many, and writes per-generation metrics to
+#   CSV or JSON Lines. See python -m pathfinder --help.
+"""
+
+import csv
+import itertools
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from pathfinder.maps import MAPS, START_POSITION
+from pathfinder.metrics import Metrics
+from pathfinder.parallel import ParallelEvaluator
+from pathfinder.population import Population
+from pathfinder.recorder import Recorder
+from pathfinder.seeding import spawn_seeds
+from pathfinder.selection import SELECTIONS
+from pathfinder.stopping import FitnessPlateau, TargetCompletion, TimeBudget
+
+# the columns written for every generation
+METRIC_FIELDS = [
+    "env", "size", "lifespan", "mutation_rate", "elite", "selection",
+    "seed", "generation", "average_fitness", "best_fitness",
+    "completion_rate", "seconds",
+]
+
+
+class MetricsWriter:
+    def __init__(self, path="-", fields=METRIC_FIELDS):
+        """MetricsWriter constructor
+
+        Rows are written as CSV when path ends in .csv, otherwise as
+        JSON Lines.
+
+        Args:
+            path (str, optional): the file to write to. Defaults to "-",
+                writing JSON Lines to stdout.
+            fields (list, optional): the CSV columns. Defaults to
+                METRIC_FIELDS.
+        """
+        self.file = sys.stdout if path == "-" else open(
+            path, "w", encoding="utf-8", newline="")
+        self.csv = None
+        if path.endswith(".csv"):
+            self.csv = csv.DictWriter(self.file, fields)
+            self.csv.writeheader()
+
+    def write(self, row):
+        """A function to write a row of metrics
+
+        Args:
+            row (dict): the metrics of one generation
+        """
+        if self.csv is not None:
+            self.csv.writerow(row)
+        else:
+            self.file.write(json.dumps(row) + "\n")
+        self.file.flush()
+
+    def close(self):
+        """A function to close the file, unless it is stdout"""
+        if self.file is not sys.stdout:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def make_stopping(config):
+    """A function to make the stopping criteria of a configuration
+
+    Args:
+        config (dict): the configuration, see run_experiment
+
+    Returns:
+        list: the stopping criteria asked for
+    """
+    stop = []
+    if config.get("target_completion"):
+        stop.append(TargetCompletion(config["target_completion"]))
+    if config.get("plateau"):
+        stop.append(FitnessPlateau(config["plateau"]))
+    if config.get("time_budget"):
+        stop.append(TimeBudget(config["time_budget"]))
+    return stop
+
+
+def run_experiment(config, write=None):
+    """A function to evolve a population for one configuration
+
+    Args:
+        config (dict): the configuration, with env, size, lifespan,
+            generations, mutation_rate, elite, selection, seed and workers,
+            and optionally target_completion, plateau, time_budget and
+            record, a directory to record the paths of record_count finders
+            picked by record_select to, profile, a file to write the
+            time spent in each phase of every generation to, and geodesic,
+            whether to compile the environment for fitness around walls
+        write (callable, optional): a function called with the metrics of
+            each generation as it finishes. Defaults to None.
+
+    Returns:
+        list: the metrics of every generation run
+    """
+    environment = MAPS[config["env"]]()
+    if config.get("geodesic"):
+        environment.compile()
+    evaluator = None
+    if config.get("workers", 1) > 1:
+        evaluator = ParallelEvaluator(environment, config["workers"])
+    recorder = None
+    if config.get("record"):
+        recorder = Recorder(config["record"],
+                            config.get("record_select", "best"),
+                            config.get("record_count", 10),
+                            seed=config["seed"])
+    profile = None
+    metrics = None
+    if config.get("profile"):
+        profile = MetricsWriter(config["profile"], Metrics.fields)
+        metrics = Metrics(profile.write)
+    population = Population(
+        config["size"], config["lifespan"], START_POSITION,
+        mutation_rate=config["mutation_rate"], elite=config["elite"],
+        selection=SELECTIONS[config["selection"]](),
+        seed=config["seed"], evaluator=evaluator, recorder=recorder,
+        metrics=metrics)
+    rows = []
+    started = [time.perf_counter()]
+
+    def record(population):
+        now = time.perf_counter()
+        average, best = population.fitness_history[-1]
+        row = {field: config.get(field) for field in METRIC_FIELDS[:7]}
+        row.update({
+            "generation": population.generation,
+            "average_fitness": average,
+            "best_fitness": best,
+            "completion_rate": population.completion_rate(environment),
+            "seconds": now - started[0],
+        })
+        started[0] = now
+        rows.append(row)
+        if write is not None:
+            write(row)
+
+    try:
+        population.run_generations(config["generations"], environment,
+                                   record, make_stopping(config))
+    finally:
+        if evaluator is not None:
+            evaluator.close()
+        if profile is not None:
+            profile.close()
+    return rows
+
+
+def sweep_configs(base, envs, sizes, mutation_rates, seed=None):
+    """A function to list every configuration of a sweep
+
+    Args:
+        base (dict): the settings shared by every configuration
+        envs (list): the environment names to run
+        sizes (list): the population sizes to run
+        mutation_rates (list): the mutation rates to run
+        seed (int, optional): the root seed, each configuration gets an
+            independent seed spawned from it. Defaults to None.
+
+    Returns:
+        list: a configuration for every combination
+    """
+    grid = list(itertools.product(envs, sizes, mutation_rates))
+    seeds = spawn_seeds(seed, len(grid))
+    return [
+        dict(base, env=env, size=size, mutation_rate=mutation_rate,
+             seed=int(config_seed.generate_state(1)[0]))
+        for (env, size, mutation_rate), config_seed in zip(grid, seeds)
+    ]
+
+
+def run_sweep(configs, writer, workers=None):
+    """A function to run many configurations in worker processes
+
+    Args:
+        configs (list): the configurations to run, see run_experiment
+        writer (MetricsWriter): the writer for every generation's metrics
+        workers (int, optional): the number of configurations run at once.
+            Defaults to None, using one per core.
+    """
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(run_experiment, config)
+                   for config in configs]
+        for future in as_completed(futures):
+            for row in future.result():
+                writer.write(row)
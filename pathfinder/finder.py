@@ -7,17 +7,20 @@
 #   the drawing, updating, and fitness calculations.
 """
 
-from graphics import Circle, Point
-
 from pathfinder.chromosome import Chromosome
+from pathfinder.engine import Engine
 from pathfinder.vector import Vector
 
 
 class Finder:
 
-    def __init__(self, chromosome=None, lifespan=0, start_position=Vector([0, 0])):
+    def __init__(self, chromosome=None, lifespan=0, start_position=Vector([0, 0]),
+                 engine=None, index=0):
         """Finder constructor
 
+        A finder is a view over one row of an Engine. Without an engine,
+        the finder makes a single row engine of its own.
+
         Args:
             chromosome (Chromosome, optional): the genetic information for the
                 finder. Defaults to None.
@@ -25,24 +28,93 @@ class Finder:
                 Defaults to 0.
             start_position (Vector, optional): a vector describing the
                 position to start. Defaults to Vector([0, 0]).
+            engine (Engine, optional): the engine holding the finder's state.
+                Defaults to None.
+            index (int, optional): the finder's row in the engine.
+                Defaults to 0.
         """
         if chromosome is None:
             self.chromosome = Chromosome(lifespan=lifespan)
         else:
             self.chromosome = chromosome
+        if engine is None:
+            engine = Engine.from_chromosomes([self.chromosome], start_position)
+            index = 0
+        self.engine = engine
+        self.index = index
         self.lifespan = len(self.chromosome.genes)
         self.start_position = start_position
-        self.position = self.start_position
-        self.velocity = Vector([0, 0])
-        self.acceleration = Vector([0, 0])
-        self.alive_duration = 0
-        self.completed = False
-        self.crashed = False
-        self.fitness = 0
-        self.step = 0
-        self.shape = Circle(Point(self.start_position.x(),
-                            self.start_position.y()), 5)
-        self.shape.setFill('red')
+        self.shape = None
+        # vectors reused by update, so a step makes no new vectors
+        self.scratch = (Vector(), Vector(), Vector())
+
+    # region Engine views
+
+    @property
+    def position(self):
+        return Vector(self.engine.positions[self.index])
+
+    @position.setter
+    def position(self, value):
+        self.engine.positions[self.index] = (value.x(), value.y())
+
+    @property
+    def velocity(self):
+        return Vector(self.engine.velocities[self.index])
+
+    @velocity.setter
+    def velocity(self, value):
+        self.engine.velocities[self.index] = (value.x(), value.y())
+
+    @property
+    def acceleration(self):
+        return Vector(self.engine.accelerations[self.index])
+
+    @acceleration.setter
+    def acceleration(self, value):
+        self.engine.accelerations[self.index] = (value.x(), value.y())
+
+    @property
+    def alive_duration(self):
+        return int(self.engine.alive_durations[self.index])
+
+    @alive_duration.setter
+    def alive_duration(self, value):
+        self.engine.alive_durations[self.index] = value
+
+    @property
+    def step(self):
+        return int(self.engine.steps[self.index])
+
+    @step.setter
+    def step(self, value):
+        self.engine.steps[self.index] = value
+
+    @property
+    def crashed(self):
+        return bool(self.engine.crashed[self.index])
+
+    @crashed.setter
+    def crashed(self, value):
+        self.engine.crashed[self.index] = value
+
+    @property
+    def completed(self):
+        return bool(self.engine.completed[self.index])
+
+    @completed.setter
+    def completed(self, value):
+        self.engine.completed[self.index] = value
+
+    @property
+    def fitness(self):
+        return float(self.engine.fitness[self.index])
+
+    @fitness.setter
+    def fitness(self, value):
+        self.engine.fitness[self.index] = value
+
+    # endregion
 
     def calculate_fitness(self, environment):
         """A function to calculate a finder's fitness
@@ -56,8 +128,9 @@ class Finder:
         """
         fitness_total = 0
         max_distance = 1.414*500  # the diagonal of the environment area
-        distance_to_target = self.position.distance_from(
-            environment.target.position)
+        row = slice(self.index, self.index + 1)
+        distance_to_target = environment.distance_to_target(
+            self.engine.positions[row], self.engine.completed[row])[0]
         # inverse proportionality to distance
         fitness_total += max_distance/distance_to_target
         # proportionality to duration
@@ -73,44 +146,88 @@ class Finder:
         """A function to update a finder
 
         Args:
-            window (GraphWin): a window to update the finder in
+            window (GraphWin): a window to update the finder in, or None
+                to update without drawing
             environment (Environment): an environment to update the finder in
         """
+        engine, index = self.engine, self.index
+        step = engine.steps[index]
         # draw the first frame
-        if self.step == 0:
-            self.shape.draw(window)
+        if step == 0 and window is not None:
+            self.show(window)
         # if out of steps in chromosome, crash the finder
-        if self.step >= self.lifespan:
-            self.crashed = True
-        if not self.crashed and not self.completed:
-            self.alive_duration += 1
-            # update the physics
-            self.position += self.velocity
-            self.velocity += self.acceleration
-            self.acceleration = self.chromosome.get_value(self.step)
+        if step >= self.lifespan and not engine.completed[index]:
+            engine.crashed[index] = True
+        if not (engine.crashed[index] or engine.completed[index]):
+            engine.alive_durations[index] += 1
+            # update the physics in place
+            position, velocity, acceleration = self.scratch
+            position.set(*engine.positions[index])
+            velocity.set(*engine.velocities[index])
+            acceleration.set(*engine.accelerations[index])
+            position += velocity
+            velocity += acceleration
+            engine.positions[index] = (position.x(), position.y())
+            engine.velocities[index] = (velocity.x(), velocity.y())
+            engine.accelerations[index] = engine.genomes[index, step]
             # test collision and completion
-            self.crashed = environment.test_collision(self)
-            self.completed = environment.test_finish(self)
+            engine.crashed[index] = environment.test_collision_at(
+                position, velocity)
+            engine.completed[index] = environment.test_finish_at(position)
             # update the graphic
-            self.shape.move(self.velocity.x(), self.velocity.y())
+            if self.shape is not None:
+                self.shape.move(velocity.x(), velocity.y())
+        self.show_state()
+        engine.steps[index] += 1
+
+    def show(self, window):
+        """A function to display a finder
+
+        Args:
+            window (GraphWin): window to add finder to
+        """
+        # graphics is only imported once something is displayed
+        from graphics import Circle, Point
+        position = self.position
+        self.shape = Circle(Point(position.x(), position.y()), 5)
+        self.shape.setFill('red')
+        self.shape.draw(window)
+
+    def show_state(self):
+        """A function to color a finder's graphic by its state"""
+        if self.shape is None:
+            return
         if self.crashed:
             self.shape.setFill("pink")
         if self.completed:
             self.shape.setFill("yellow")
-        self.step += 1
 
-    def get_child(self, other):
+    def get_child(self, other, rng=None):
         """A function to create a child finder with another
 
         Args:
             other (Finder): the other finder to make a child with
+            rng (np.random.Generator, optional): the generator to draw from.
+                Defaults to None, using the default generator.
 
         Returns:
             Finder: the newly created child finder
         """
-        mutation_rate = 0.05  # tuned mutation rate (5%)
-        child_chromosome = self.chromosome.crossover(other.chromosome)
-        child_chromosome = child_chromosome.get_mutation(mutation_rate)
-        child = Finder(chromosome=child_chromosome,
+        child = Finder(chromosome=self.get_child_chromosome(other, rng),
                        start_position=self.start_position)
         return child
+
+    def get_child_chromosome(self, other, rng=None):
+        """A function to create a child chromosome with another finder
+
+        Args:
+            other (Finder): the other finder to make a child with
+            rng (np.random.Generator, optional): the generator to draw from.
+                Defaults to None, using the default generator.
+
+        Returns:
+            Chromosome: the chromosome for the child finder
+        """
+        mutation_rate = 0.05  # tuned mutation rate (5%)
+        child_chromosome = self.chromosome.crossover(other.chromosome, rng)
+        return child_chromosome.get_mutation(mutation_rate, rng)
@@ -0,0 +1,285 @@
+"""
+# island.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file contains the island model. Several populations
+#   evolve apart, each in its own process, and swap their
+#   fittest genomes every few generations. Islands can run
+#   as local processes or be served from other hosts with
+#   python -m pathfinder.island --address host:port, with
+#   the key in $PATHFINDER_AUTHKEY.
+"""
+
+import argparse
+import multiprocessing
+import os
+import traceback
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+from pathfinder.population import Population
+from pathfinder.seeding import spawn_seeds
+
+
+def migration_routes(islands, topology="ring"):
+    """A function to list which islands send migrants to which
+
+    Args:
+        islands (int): the number of islands
+        topology (str, optional): "ring", each island sending to the next,
+            or "all", each island sending to every other. Defaults to "ring".
+
+    Returns:
+        list: a (source, destination) pair for every route
+    """
+    if topology == "ring":
+        return [(index, (index + 1) % islands)
+                for index in range(islands) if islands > 1]
+    if topology == "all":
+        return [(source, destination) for source in range(islands)
+                for destination in range(islands) if source != destination]
+    raise ValueError(f"unknown topology: {topology}")
+
+
+def serve_island(connection):
+    """A function to run an island for a coordinator until it is closed
+
+    The coordinator sends (command, *args) tuples and gets back
+    ("ok", result) or ("error", traceback) for each.
+
+    Args:
+        connection (Connection): the connection to the coordinator
+    """
+    population = environment = None
+    while True:
+        command, *args = connection.recv()
+        if command == "close":
+            break
+        try:
+            if command == "setup":
+                environment, kwargs = args
+                population = Population(**kwargs)
+                result = None
+            elif command == "run":
+                result = population.run_generations(args[0], environment)
+            elif command == "evaluate":
+                population.evaluate_generation(environment)
+                result = population.emigrants(args[0])
+            elif command == "migrate":
+                population.immigrate(*args)
+                population.breed()
+                result = population.fitness_history[-1:]
+            elif command == "snapshot":
+                result = population.snapshot()
+            else:
+                raise ValueError(f"unknown command: {command}")
+            connection.send(("ok", result))
+        except Exception:
+            connection.send(("error", traceback.format_exc()))
+    connection.close()
+
+
+class IslandModel:
+    def __init__(self, environment, size, lifespan, start_position,
+                 islands=4, interval=10, migrants=2, topology="ring",
+                 seed=None, addresses=None, authkey=None,
+                 **population_kwargs):
+        """IslandModel constructor
+
+        Args:
+            environment (Environment): the environment every island runs in
+            size (int): number of finders on each island
+            lifespan (int): number of steps in each finder
+            start_position (Vector): a vector describing the start position
+            islands (int, optional): the number of local island processes,
+                ignored when addresses are given. Defaults to 4.
+            interval (int, optional): the generations between migrations.
+                Defaults to 10.
+            migrants (int, optional): the fittest genomes each island sends
+                along each of its routes. Defaults to 2.
+            topology (str, optional): "ring" or "all", see
+                migration_routes. Defaults to "ring".
+            seed (int OR np.random.SeedSequence, optional): the root seed,
+                each island gets an independent seed spawned from it.
+                Defaults to None, seeding from the operating system.
+            addresses (list, optional): the (host, port) of islands served
+                with serve_island on other hosts. Defaults to None,
+                starting local processes.
+            authkey (bytes, optional): the key the served islands were
+                started with. Defaults to None.
+            population_kwargs: further arguments for each Population, which
+                have to be picklable
+        """
+        self.interval = interval
+        self.migrants = migrants
+        self.processes = []
+        if addresses is None:
+            self.connections = []
+            for _ in range(islands):
+                connection, island_connection = multiprocessing.Pipe()
+                process = multiprocessing.Process(
+                    target=serve_island, args=(island_connection,),
+                    daemon=True)
+                process.start()
+                island_connection.close()
+                self.connections.append(connection)
+                self.processes.append(process)
+        else:
+            self.connections = [Client(tuple(address), authkey=authkey)
+                                for address in addresses]
+        self.routes = migration_routes(len(self.connections), topology)
+        self.histories = [[] for _ in self.connections]
+        seeds = spawn_seeds(seed, len(self.connections))
+        self.call_each("setup", [
+            (environment, dict(population_kwargs, size=size,
+                               lifespan=lifespan,
+                               start_position=start_position,
+                               seed=island_seed))
+            for island_seed in seeds
+        ])
+
+    def call_each(self, command, arguments):
+        """A function to send a command to every island and wait for all
+
+        Every island works on its command at the same time.
+
+        Args:
+            command (str): the command to send
+            arguments (list): the arguments for each island, in order
+
+        Returns:
+            list: the result from each island
+        """
+        for connection, args in zip(self.connections, arguments):
+            connection.send((command, *args))
+        results = []
+        for connection in self.connections:
+            status, result = connection.recv()
+            if status == "error":
+                raise RuntimeError(f"island failed on {command}:\n{result}")
+            results.append(result)
+        return results
+
+    def call_all(self, command, *args):
+        """A function to send the same command to every island
+
+        Args:
+            command (str): the command to send
+            args: the arguments for every island
+
+        Returns:
+            list: the result from each island
+        """
+        return self.call_each(command, [args] * len(self.connections))
+
+    def extend_histories(self, results):
+        """A function to add the fitness reported by each island
+
+        Args:
+            results (list): the new (average, best) fitness of each island
+        """
+        for history, result in zip(self.histories, results):
+            history.extend(result)
+
+    def run(self, generations):
+        """A function to evolve every island, migrating between them
+
+        Args:
+            generations (int): the number of generations to run
+
+        Returns:
+            list: the (average, best) fitness of each generation run, for
+                every island
+        """
+        first = len(self.histories[0])
+        done = 0
+        while done < generations:
+            epoch = min(self.interval, generations - done)
+            if epoch < self.interval or not self.routes or not self.migrants:
+                self.extend_histories(self.call_all("run", epoch))
+            else:
+                self.extend_histories(self.call_all("run", epoch - 1))
+                self.migrate()
+            done += epoch
+        return [history[first:] for history in self.histories]
+
+    def migrate(self):
+        """A function to evaluate every island and swap their fittest
+        genomes along the routes, then breed each island
+        """
+        emigrants = self.call_all("evaluate", self.migrants)
+        arriving = [[] for _ in self.connections]
+        for source, destination in self.routes:
+            arriving[destination].append(emigrants[source])
+        self.extend_histories(self.call_each("migrate", [
+            (np.concatenate([genomes for genomes, _ in incoming]),
+             np.concatenate([fitness for _, fitness in incoming]))
+            if incoming else (np.zeros((0, 0, 2)), np.zeros(0))
+            for incoming in arriving
+        ]))
+
+    def snapshots(self):
+        """A function to get the state of every island
+
+        Returns:
+            list: the Population.snapshot of each island
+        """
+        return self.call_all("snapshot")
+
+    def close(self):
+        """A function to stop every island"""
+        for connection in self.connections:
+            try:
+                connection.send(("close",))
+            except OSError:
+                pass
+            connection.close()
+        for process in self.processes:
+            process.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main(argv=None):
+    """A function to serve islands to coordinators on other hosts
+
+    Connections unpickle what they receive, so anyone holding the key
+    can run code on this host. There is no default key.
+
+    Args:
+        argv (list, optional): the command line arguments.
+            Defaults to None, using sys.argv.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m pathfinder.island",
+        description="Serve islands to an IslandModel on another host."
+    )
+    parser.add_argument("--address", default="127.0.0.1:6481",
+                        help="host:port to listen on (default only this "
+                             "host)")
+    parser.add_argument("--authkey",
+                        default=os.environ.get("PATHFINDER_AUTHKEY"),
+                        help="key coordinators have to connect with "
+                             "(default $PATHFINDER_AUTHKEY), required")
+    args = parser.parse_args(argv)
+    if not args.authkey:
+        parser.error("an authkey is required, pass --authkey or set "
+                     "PATHFINDER_AUTHKEY")
+    host, port = args.address.rsplit(":", 1)
+    with Listener((host, int(port)),
+                  authkey=args.authkey.encode()) as listener:
+        while True:
+            # each connection is one island of one run
+            connection = listener.accept()
+            multiprocessing.Process(target=serve_island,
+                                    args=(connection,), daemon=True).start()
+            connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+# live.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file runs a population in a background thread for
+#   the live window. The window asks for a frame whenever
+#   it is ready to draw, so drawing never holds up training.
+"""
+
+import threading
+
+from pathfinder.render import Frame
+
+
+class Simulation:
+    def __init__(self, population, environment):
+        """Simulation constructor
+
+        The population should have no renderer of its own, as Tk may
+        only be used from the main thread.
+
+        Args:
+            population (Population): the population to run
+            environment (Environment): an Environment to run it in
+        """
+        self.population = population
+        self.environment = environment
+        self.frame = None
+        # an error the thread stopped on, raised again to the window
+        self.error = None
+        self.wanted = threading.Event()
+        self.ready = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.loop, daemon=True)
+
+    def start(self):
+        """A function to start running the population"""
+        self.thread.start()
+
+    def loop(self):
+        """A function to step the population as fast as it can, run by
+        the thread
+        """
+        population, environment = self.population, self.environment
+        try:
+            while not self.stopping.is_set():
+                engine = population.engine
+                if engine.finished():
+                    # if the generation is over, step the population
+                    population.step(environment)
+                else:
+                    engine.step(environment)
+                if self.wanted.is_set():
+                    self.wanted.clear()
+                    self.publish()
+        except Exception as error:
+            self.error = error
+            # wake the window so it sees the error
+            self.ready.set()
+
+    def publish(self):
+        """A function to copy the population's state for the window"""
+        population = self.population
+        engine = population.engine
+        readout = ""
+        if population.fitness_history:
+            readout = ("Last round's average fitness: "
+                       f"{population.fitness_history[-1][0]}")
+        self.frame = Frame(population.generation, engine.positions.copy(),
+                           engine.crashed.copy(), engine.completed.copy(),
+                           readout)
+        self.ready.set()
+
+    def take(self, timeout=None):
+        """A function to get a frame of the population as it is now
+
+        Args:
+            timeout (float, optional): the most seconds to wait.
+                Defaults to None, waiting as long as it takes.
+
+        Returns:
+            Frame: the frame, or None if none was ready in time
+
+        Raises:
+            Exception: the error the simulation stopped on, if any
+        """
+        self.wanted.set()
+        if not self.ready.wait(timeout):
+            return None
+        if self.error is not None:
+            raise self.error
+        self.ready.clear()
+        return self.frame
+
+    def stop(self):
+        """A function to stop running the population
+
+        Raises:
+            Exception: the error the simulation stopped on, if any
+        """
+        self.stopping.set()
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,49 @@
+"""
+# maps.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file contains the environments used for testing,
+#   along with the start position finders use in them.
+"""
+
+from pathfinder.environment import Border, Environment, Target, Wall
+from pathfinder.vector import Vector
+
+# where finders start in every map
+START_POSITION = Vector([50, 250])
+
+
+def swerve():
+    """A function to make swerve, a challeneging environment for testing
+
+    Returns:
+        Environment: the swerve environment
+    """
+    return Environment(
+        border=Border(Vector([20, 20]), Vector([480, 480])),
+        target=Target(Vector([450, 250])),
+        walls=[
+            Wall(Vector([150, 20]), Vector([0, 230])),
+            Wall(Vector([230, 480]), Vector([0, -230])),
+            Wall(Vector([310, 20]), Vector([0, 230]))
+        ]
+    )
+
+
+def simple():
+    """A function to make simple, an almost empty environment for testing
+
+    Returns:
+        Environment: the simple environment
+    """
+    return Environment(
+        border=Border(Vector([20, 20]), Vector([480, 480])),
+        target=Target(Vector([450, 250])),
+        walls=[]
+    )
+
+
+MAPS = {
+    "swerve": swerve,
+    "simple": simple,
+}
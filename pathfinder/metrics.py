@@ -0,0 +1,162 @@
+"""
+# metrics.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file contains the profiling metrics, timing each phase
+#   of a generation and counting the work done in it. A
+#   population without metrics uses NullMetrics, which does
+#   nothing.
+"""
+
+import time
+
+# the phases timed, physics, collision, completion and fitness
+#   happen within evaluation
+PHASES = ("evaluation", "physics", "collision", "completion", "fitness",
+          "selection", "breeding")
+# the work counted
+COUNTERS = ("finder_steps", "collision_tests", "cache_hits", "cache_misses",
+            "steps_saved")
+
+
+class PhaseTimer:
+    """A context manager adding the time spent in it to a phase"""
+
+    __slots__ = ("seconds", "phase", "started")
+
+    def __init__(self, seconds, phase):
+        """PhaseTimer constructor
+
+        Args:
+            seconds (dict): the seconds spent in each phase
+            phase (str): the phase to add to
+        """
+        self.seconds = seconds
+        self.phase = phase
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.seconds[self.phase] += time.perf_counter() - self.started
+
+
+class Metrics:
+    # whether engines should time and count their steps
+    enabled = True
+    # the columns of every generation's row
+    fields = ["generation"] + [f"{phase}_seconds" for phase in PHASES] \
+        + list(COUNTERS)
+
+    def __init__(self, callback=None):
+        """Metrics constructor
+
+        A metrics object is given to a Population, which times its phases
+        and counts its work into it and ends a row after every breed.
+        Generations evaluated by a ParallelEvaluator are only timed as a
+        whole, as the workers keep no metrics.
+
+        Args:
+            callback (callable, optional): a function called with the row
+                of each generation as it ends, such as MetricsWriter.write.
+                Defaults to None.
+        """
+        self.callback = callback
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self.timers = {phase: PhaseTimer(self.seconds, phase)
+                       for phase in PHASES}
+        self.history = []
+        # the cache counters at the end of the last generation
+        self.cache_totals = (0, 0, 0)
+
+    def timer(self, phase):
+        """A function to time a phase
+
+        Args:
+            phase (str): one of PHASES
+
+        Returns:
+            PhaseTimer: a context manager timing its block
+        """
+        return self.timers[phase]
+
+    def count(self, counter, amount):
+        """A function to add to a counter
+
+        Args:
+            counter (str): one of COUNTERS
+            amount (int): the amount to add
+        """
+        self.counts[counter] += amount
+
+    def cache_counts(self, population):
+        """A function to count the cache work since the last generation
+
+        Args:
+            population (Population): the population ending a generation
+        """
+        cache = population.fitness_cache or population.trajectories
+        if cache is None:
+            return
+        totals = (cache.hits, cache.misses,
+                  getattr(cache, "steps_saved", 0))
+        for counter, total, last in zip(COUNTERS[2:], totals,
+                                        self.cache_totals):
+            self.counts[counter] += total - last
+        self.cache_totals = totals
+
+    def end_generation(self, population):
+        """A function to end the row of a generation and start the next
+
+        Args:
+            population (Population): the population that just bred
+
+        Returns:
+            dict: the row of the generation
+        """
+        self.cache_counts(population)
+        row = {"generation": population.generation}
+        for phase in PHASES:
+            row[f"{phase}_seconds"] = self.seconds[phase]
+            self.seconds[phase] = 0.0
+        for counter in COUNTERS:
+            row[counter] = self.counts[counter]
+            self.counts[counter] = 0
+        self.history.append(row)
+        if self.callback is not None:
+            self.callback(row)
+        return row
+
+
+class NullTimer:
+    """A context manager that times nothing"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class NullMetrics(Metrics):
+    """Metrics that keep nothing, the default of every population"""
+
+    enabled = False
+
+    def __init__(self):
+        super().__init__()
+        self.null_timer = NullTimer()
+
+    def timer(self, phase):
+        return self.null_timer
+
+    def count(self, counter, amount):
+        pass
+
+    def end_generation(self, population):
+        return None
@@ -0,0 +1,160 @@
+"""
+# parallel.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file contains the parallel evaluator. A population's
+#   genomes are shared with a pool of worker processes through
+#   shared memory, and every worker simulates one shard of it.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from pathfinder.engine import Engine
+from pathfinder.vector import Vector
+
+# state held by each worker process
+_worker = {"environment": None, "memory": None}
+
+
+def _start_worker(environment):
+    """A function to set up a worker process
+
+    Args:
+        environment (Environment): the environment the worker simulates in
+    """
+    _worker["environment"] = environment
+
+
+def _attach(name):
+    """A function to attach a worker to a shared memory block
+
+    Args:
+        name (str): the name of the shared memory block
+
+    Returns:
+        SharedMemory: the attached block
+    """
+    memory = _worker["memory"]
+    if memory is None or memory.name != name:
+        if memory is not None:
+            memory.close()
+        # the block belongs to the parent process, which unlinks it
+        memory = SharedMemory(name=name)
+        _worker["memory"] = memory
+    return memory
+
+
+def _evaluate_shard(name, shape, dtype, start, stop, start_position,
+                    min_alive_fraction=0.0):
+    """A function to simulate one shard of the genomes in a worker
+
+    Args:
+        name (str): the name of the shared memory block of genomes
+        shape (tuple): the shape of the whole genome matrix
+        dtype (str): the dtype of the genome matrix
+        start (int): the first genome of the shard
+        stop (int): the genome after the last of the shard
+        start_position (tuple): the x and y of the start position
+        min_alive_fraction (float, optional): the part of the finders
+            that has to be moving for the run to go on. Defaults to 0.0.
+
+    Returns:
+        tuple: the fitness of the shard's finders, and the steps the
+            shard ran for
+    """
+    memory = _attach(name)
+    genomes = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+    engine = Engine(genomes[start:stop], Vector(list(start_position)),
+                    min_alive_fraction)
+    steps = engine.run(_worker["environment"])
+    return engine.calculate_fitness(_worker["environment"]), steps
+
+
+class ParallelEvaluator:
+    def __init__(self, environment, workers=None):
+        """ParallelEvaluator constructor
+
+        Args:
+            environment (Environment): the environment to evaluate in, sent
+                to each worker once
+            workers (int, optional): the number of worker processes.
+                Defaults to None, using one per core.
+        """
+        self.environment = environment
+        self.workers = workers if workers is not None else os.cpu_count()
+        self.executor = ProcessPoolExecutor(
+            self.workers,
+            initializer=_start_worker,
+            initargs=(environment,)
+        )
+        self.memory = None
+
+    def evaluate(self, genomes, start_position, ticks=None,
+                 min_alive_fraction=0.0):
+        """A function to calculate the fitness of genomes in the workers
+
+        Args:
+            genomes (np.ndarray): the (size, lifespan, 2) genome matrix
+            start_position (Vector): a vector describing the start position
+            ticks (np.ndarray, optional): a (size,) array to fill with the
+                steps each genome's shard ran for. Defaults to None.
+            min_alive_fraction (float, optional): the part of a shard's
+                finders that has to be moving for its run to go on, the
+                population's own setting. Defaults to 0.0, running until
+                every finder has stopped.
+
+        Returns:
+            np.ndarray: the (size,) fitness of the genomes
+        """
+        if len(genomes) == 0:
+            return np.zeros(0)
+        # the shared block is reused between generations while it fits,
+        # genomes are shared in their own dtype, such as float32 from a
+        # GenomeStore
+        nbytes = genomes.nbytes
+        if self.memory is None or self.memory.size < nbytes:
+            self.release()
+            self.memory = SharedMemory(create=True, size=max(nbytes, 1))
+        shared = np.ndarray(genomes.shape, dtype=genomes.dtype,
+                            buffer=self.memory.buf)
+        shared[:] = genomes
+        bounds = np.linspace(0, len(genomes), self.workers + 1, dtype=int)
+        shards = [(start, stop) for start, stop
+                  in zip(bounds[:-1], bounds[1:]) if stop > start]
+        futures = [
+            self.executor.submit(
+                _evaluate_shard, self.memory.name, genomes.shape,
+                genomes.dtype.str, start, stop,
+                (start_position.x(), start_position.y()),
+                min_alive_fraction)
+            for start, stop in shards
+        ]
+        fitness = []
+        for (start, stop), future in zip(shards, futures):
+            shard_fitness, steps = future.result()
+            fitness.append(shard_fitness)
+            if ticks is not None:
+                ticks[start:stop] = steps
+        return np.concatenate(fitness)
+
+    def release(self):
+        """A function to free the shared memory block"""
+        if self.memory is not None:
+            self.memory.close()
+            self.memory.unlink()
+            self.memory = None
+
+    def close(self):
+        """A function to stop the workers and free the shared memory"""
+        self.executor.shutdown()
+        self.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -7,49 +7,380 @@
 #   and repeating.
 """
 
-import random
-
-from graphics import Point, Text
+import numpy as np
 
+from pathfinder.cache import shared_prefix
+from pathfinder.checkpoint import (read_checkpoint, rng_from_array,
+                                   rng_to_array, write_checkpoint)
+from pathfinder.chromosome import (Chromosome, crossover_genomes,
+                                   mutate_genomes, random_genomes)
+from pathfinder.engine import Engine
 from pathfinder.finder import Finder
+from pathfinder.metrics import NullMetrics
+from pathfinder.render import GraphicsRenderer, Renderer
+from pathfinder.seeding import make_rng, spawn_seeds
+from pathfinder.selection import TruncationSelection, fittest
+from pathfinder.store import GenomeStore, chunks
+from pathfinder.vector import Vector
 
 
 class Population:
+    # the children bred from each random stream, fixed so that breeding
+    #   gives the same children however the population is chunked
+    breed_block = 1024
+    # the genomes copied at a time between a store and a checkpoint
+    copy_block = 16384
 
-    def __init__(self, size, lifespan, start_position, window):
+    def __init__(self, size, lifespan, start_position, window=None,
+                 renderer=None, mutation_rate=0.05, magnitude=1,
+                 evaluator=None, seed=None, genomes=None, store=None,
+                 chunk_size=None, selection=None, trajectories=None,
+                 fitness_cache=None, elite=0, min_alive_fraction=0.0,
+                 recorder=None, metrics=None):
         """Population constructor
 
         Args:
             size (int): number of finders in population
             lifespan (int): number of steps in each finder
             start_position (Vector): a vector describing the start position
-            window (GraphWin): a window to add the population to
+            window (GraphWin, optional): a window to add the population to.
+                Defaults to None, running headless.
+            renderer (Renderer, optional): the renderer to display the
+                population with. Defaults to None, drawing in window if
+                one is given.
+            mutation_rate (float, optional): the rate of mutation for
+                children. Defaults to 0.05, the tuned rate.
+            magnitude (int, optional): the magnitude of every gene.
+                Defaults to 1.
+            evaluator (ParallelEvaluator, optional): an evaluator to
+                simulate whole generations in worker processes.
+                Defaults to None, simulating in this process.
+            seed (int OR np.random.SeedSequence OR np.random.Generator,
+                optional): the seed for every random draw the population
+                makes. Defaults to None, seeding from the operating system.
+            genomes (np.ndarray, optional): the (size, lifespan, 2) genome
+                matrix to start from. Defaults to None, making random genomes.
+            store (GenomeStore, optional): a memory-mapped store to keep the
+                genomes in instead of memory. Defaults to None.
+            chunk_size (int, optional): the number of finders simulated at
+                a time. Breeding always works in blocks of breed_block
+                children, so results do not depend on it. Defaults to
+                None, simulating the whole population at once.
+            selection (Selection, optional): the operator drawing the
+                parents of each generation. Defaults to None, breeding from
+                the fittest half.
+            trajectories (TrajectoryCache, optional): a cache of the
+                finders' paths, so children are only simulated from where
+                they differ from their parents. Can not be used with an
+                evaluator. Defaults to None.
+            fitness_cache (FitnessCache, optional): a cache of fitness by
+                genome, so genomes seen before are not simulated again.
+                Can not be used with trajectories. Defaults to None.
+            elite (int, optional): the number of fittest finders carried
+                over unchanged to the next generation, keeping their
+                fitness. Defaults to 0.
+            min_alive_fraction (float, optional): the part of the finders
+                that has to be moving for a generation to go on, the rest
+                are scored where they are. Can not be used with
+                trajectories or a fitness cache. Defaults to 0.0, running
+                until every finder has stopped.
+            recorder (Recorder, optional): a recorder writing the paths of
+                some finders after every evaluation. Defaults to None.
+            metrics (Metrics, optional): the metrics to time the phases of
+                each generation and count its work into. Defaults to None,
+                keeping none.
         """
         self.size = size
-        self.finders = []
+        self.lifespan = lifespan
+        self.start_position = start_position
+        self.mutation_rate = mutation_rate
+        self.magnitude = magnitude
+        self.evaluator = evaluator
+        self.rng = make_rng(seed)
+        self.store = store
+        self.chunk_size = chunk_size
+        if selection is None:
+            selection = TruncationSelection()
+        self.selection = selection
+        if trajectories is not None and fitness_cache is not None:
+            raise ValueError(
+                "a population can use a trajectory or fitness cache, not both")
+        if trajectories is not None and evaluator is not None:
+            raise ValueError(
+                "trajectories are kept in process, not with an evaluator")
+        if trajectories is not None and min_alive_fraction > 0:
+            raise ValueError(
+                "trajectories need every finder to run until it stops")
+        if fitness_cache is not None and min_alive_fraction > 0:
+            raise ValueError(
+                "cached fitness needs every finder to run until it stops")
+        self.trajectories = trajectories
+        self.fitness_cache = fitness_cache
+        self.elite = elite
+        self.min_alive_fraction = min_alive_fraction
+        self.recorder = recorder
+        if metrics is None:
+            metrics = NullMetrics()
+        self.metrics = metrics
+        self.generation = 0
+        self.fitness = np.zeros(size)
+        self.fitness_history = []
+        # the buffer the next generation is bred into, reused every breed
+        self.spare_genomes = None
+        if store is not None:
+            if (store.size, store.lifespan) != (size, lifespan):
+                raise ValueError(
+                    "the store does not match the population size and lifespan")
+            genomes = store.current
+        elif genomes is not None:
+            # keep a copy, as the buffer is reused for breeding
+            genomes = np.array(genomes, dtype=float)
         # make the inital finders with random stats
-        for _ in range(size):
-            self.finders.append(
-                Finder(lifespan=lifespan, start_position=start_position))
-        # create a readout of fitness
-        self.fitness_readout = Text(Point(250, 520), "")
-        self.fitness_readout.draw(window)
+        if genomes is None:
+            genomes = random_genomes(size, lifespan, magnitude, self.rng)
+        self.set_genomes(genomes)
+        if renderer is None:
+            renderer = Renderer() if window is None else GraphicsRenderer(window)
+        self.renderer = renderer
+
+    def set_genomes(self, genomes):
+        """A function to replace the population with new genomes
+
+        Args:
+            genomes (np.ndarray): the (size, lifespan, 2) genome matrix
+                making up the new population
+        """
+        self.genomes = genomes
+        self._engine = None
+        self._finders = None
+        # the generation the trajectories were cached under, and the
+        # parents of the genomes in the generation before
+        self.trajectory_generation = None
+        self.lineage = None
+        # the fitness of the leading genomes, carried over as elites
+        self.elite_fitness = np.zeros(0)
+        # the most steps each finder was simulated for, less than its
+        # lifespan when min_alive_fraction cut its batch short
+        self.ticks = np.full(len(genomes), genomes.shape[1] + 1)
+
+    @property
+    def engine(self):
+        """The engine simulating the whole population, made on first use
+
+        Returns:
+            Engine: the engine over the population's genomes
+        """
+        if self._engine is None:
+            self._engine = Engine(self.genomes, self.start_position,
+                                  self.min_alive_fraction, self.metrics)
+        return self._engine
+
+    @property
+    def finders(self):
+        """The finders of the population, as views over the engine
+
+        Each finder's chromosome holds a copy of its genes, as the genome
+        buffers are bred over by later generations. The finders' state
+        still follows the engine of the current generation only.
+
+        Returns:
+            list: a Finder for every genome
+        """
+        if self._finders is None:
+            self._finders = [
+                Finder(chromosome=Chromosome(genes=np.array(genes,
+                                                            dtype=float),
+                                             magnitude=self.magnitude),
+                       start_position=self.start_position,
+                       engine=self.engine, index=index)
+                for index, genes in enumerate(self.genomes)
+            ]
+        return self._finders
 
     def run(self, window, environment):
         """A function to run the population
 
+        The population is drawn by its renderer, window is kept for
+        compatibility.
+
         Args:
             window (GraphWin): a window to run the population in
             environment (Environment): an Environment to run the population in
         """
-        alive_count = 0
-        for finder in self.finders:
-            finder.update(window, environment)
-            if not (finder.crashed or finder.completed):
-                alive_count += 1
-        if alive_count == 0:  # if no finders are alive, step the population
+        # draw the first frame
+        if self.engine.steps.max() == 0:
+            self.renderer.start_generation(self)
+        moved = self.engine.step(environment)
+        # update the graphics
+        self.renderer.draw(self, moved, self.engine.stopped)
+        if self.engine.finished():
+            # if the generation is over, step the population
             self.step(environment)
 
+    def evaluate_generation(self, environment):
+        """A function to simulate a whole generation without drawing
+
+        Every finder is run from the start position until it has crashed
+        or completed, which is at most lifespan steps. Only when the whole
+        population is simulated at once in this process, without a cache,
+        does the engine keep the finders' final state, otherwise only
+        fitness is kept.
+
+        Args:
+            environment (Environment): an Environment to run the population in
+
+        Returns:
+            np.ndarray: the (size,) fitness of the finders
+        """
+        with self.metrics.timer("evaluation"):
+            self.simulate_generation(environment)
+        if self.recorder is not None:
+            self.recorder.record(self, environment)
+        return self.fitness
+
+    def simulate_generation(self, environment):
+        """A function to fill in the fitness of a generation
+
+        Args:
+            environment (Environment): an Environment to run the population in
+        """
+        if (self.evaluator is not None
+                and self.evaluator.environment is not environment):
+            raise ValueError(
+                "the evaluator was made for a different environment")
+        # the elites keep their fitness, so only the rest are simulated
+        carried = len(self.elite_fitness)
+        if self.fitness_cache is not None:
+            self.fitness[carried:] = self.fitness_cache.evaluate(
+                self.genomes[carried:], self.start_position, environment,
+                lambda genomes: self.simulate(genomes, environment))
+        elif self.trajectories is not None:
+            for start, stop in chunks(self.size, self.trajectory_batch()):
+                parents, prefixes = self.lineage_batches(start, stop)
+                self.fitness[start:stop] = self.trajectories.evaluate(
+                    self.genomes[start:stop], (self.generation, start),
+                    self.start_position, environment, parents, prefixes,
+                    self.metrics)
+            self.trajectory_generation = self.generation
+        elif self.evaluator is None and (
+                self.chunk_size is None or self.chunk_size >= self.size):
+            self.engine.reset()
+            self.engine.crashed[:carried] = True
+            self.engine.update_active()
+            observer = None
+            if self.recorder is not None:
+                observer = self.recorder.watch(self)
+            self.ticks[carried:] = self.engine.run(environment, observer)
+            self.fitness = self.engine.calculate_fitness(environment)
+        else:
+            self.fitness[carried:] = self.simulate(
+                self.genomes[carried:], environment, self.ticks[carried:])
+        self.fitness[:carried] = self.elite_fitness
+
+    def simulate(self, genomes, environment, ticks=None):
+        """A function to get the fitness of genomes, keeping no other state
+
+        Args:
+            genomes (np.ndarray): a (count, lifespan, 2) genome matrix
+            environment (Environment): an Environment to run the genomes in
+            ticks (np.ndarray, optional): a (count,) array to fill with the
+                steps each genome's chunk ran for. Defaults to None.
+
+        Returns:
+            np.ndarray: the (count,) fitness of the genomes
+        """
+        if self.evaluator is not None:
+            return self.evaluator.evaluate(genomes, self.start_position,
+                                           ticks, self.min_alive_fraction)
+        fitness = np.empty(len(genomes))
+        # simulate a chunk at a time so state stays bounded
+        for start, stop in chunks(len(genomes), self.chunk_size):
+            engine = Engine(genomes[start:stop], self.start_position,
+                            self.min_alive_fraction, self.metrics)
+            steps = engine.run(environment)
+            if ticks is not None:
+                ticks[start:stop] = steps
+            fitness[start:stop] = engine.calculate_fitness(environment)
+        return fitness
+
+    def trajectory_batch(self):
+        """A function to get the number of finders in each trajectory batch
+
+        Batches are cut to the trajectory cache's capacity, so each one
+        can be kept.
+
+        Returns:
+            int: the most finders in a batch
+        """
+        return min(self.chunk_size or self.size, self.trajectories.capacity)
+
+    def lineage_batches(self, start, stop):
+        """A function to group a chunk of finders by their parents' batch
+
+        Args:
+            start (int): the first finder of the chunk
+            stop (int): the finder after the last of the chunk
+
+        Returns:
+            tuple: the parents and prefixes to pass to
+                TrajectoryCache.evaluate
+        """
+        if self.lineage is None:
+            return (), None
+        generation, rows, prefixes = self.lineage
+        rows = rows[start:stop]
+        parents = []
+        for begin, end in chunks(self.size, self.trajectory_batch()):
+            children = np.flatnonzero((rows >= begin) & (rows < end))
+            parents.append(
+                ((generation, begin), children, rows[children] - begin))
+        return parents, prefixes[start:stop]
+
+    def completion_rate(self, environment):
+        """A function to get the part of the last generation that completed
+
+        Args:
+            environment (Environment): the Environment it was run in
+
+        Returns:
+            float: the fraction of finders that reached the target
+        """
+        threshold = Engine.completion_threshold(environment)
+        return np.count_nonzero(self.fitness >= threshold) / self.size
+
+    def run_generations(self, generations, environment, callback=None,
+                        stop=None):
+        """A function to evolve the population for many generations
+
+        Args:
+            generations (int): the most generations to run
+            environment (Environment): an Environment to run the population in
+            callback (callable, optional): a function called with the
+                population after each generation, such as a Checkpointer.
+                Defaults to None.
+            stop (StoppingCriterion OR list, optional): criteria ending the
+                run early once any of them is met. Defaults to None.
+
+        Returns:
+            list: the (average, best) fitness of each generation run
+        """
+        if stop is None:
+            stop = []
+        elif not isinstance(stop, (list, tuple)):
+            stop = [stop]
+        for criterion in stop:
+            criterion.start(self)
+        first = len(self.fitness_history)
+        for _ in range(generations):
+            self.evaluate_generation(environment)
+            self.breed()
+            if callback is not None:
+                callback(self)
+            if any(criterion.should_stop(self, environment)
+                   for criterion in stop):
+                break
+        return self.fitness_history[first:]
+
     def step(self, environment):
         """A function to step from one population to the next
 
@@ -57,24 +388,196 @@ class Population:
             environment (Environment): the Environment the population
                 was ran in
         """
-        # sort finders on fitness
-        sorted_finders = sorted(
-            self.finders,
-            key=lambda finder: finder.calculate_fitness(environment),
-            reverse=True
-        )
-        average_fitness = sum(
-            finder.fitness for finder in self.finders)/len(self.finders)
-        self.fitness_readout.setText(
+        self.fitness = self.engine.calculate_fitness(environment)
+        self.breed()
+
+    def breed(self):
+        """A function to replace the population with the children of its
+        selected finders, using the fitness from the last evaluation
+
+        Children are bred a block at a time straight into a buffer kept
+        from the generation before, so breeding allocates nothing the
+        size of the population. Each block draws from its own stream
+        spawned from the population's generator, so the children do not
+        depend on chunk_size.
+        """
+        average_fitness = self.fitness.mean()
+        self.fitness_history.append(
+            (float(average_fitness), float(self.fitness.max())))
+        self.generation += 1
+        self.renderer.show_readout(
             f"Last round's average fitness: {average_fitness}")
-        # where to split the population
-        cutoff = self.size / 2 if self.size % 2 == 0 else (self.size + 1) / 2
-        # the lucky finders who will continue on
-        mating_pool = sorted_finders[0:int(cutoff) + 1]
-        new_finders = []
-        for _ in range(self.size):
-            first_parent = random.choice(mating_pool)
-            second_parent = random.choice(mating_pool)
-            new_finders.append(first_parent.get_child(second_parent))
-        # apply the new finders, ensuring there is the proper amount
-        self.finders = new_finders[0:self.size]
+        elites = fittest(self.fitness, self.elite) if self.elite else []
+        children_count = self.size - len(elites)
+        # draw both parents of every child at once
+        with self.metrics.timer("selection"):
+            parents = self.selection.select(
+                self.fitness, 2 * children_count, self.rng
+            ).reshape(children_count, 2)
+        if self.store is not None:
+            next_genomes = self.store.next
+        else:
+            if (self.spare_genomes is None
+                    or self.spare_genomes.shape != self.genomes.shape):
+                self.spare_genomes = np.empty_like(self.genomes)
+            next_genomes = self.spare_genomes
+        generation = self.trajectory_generation
+        if generation is not None:
+            # the parent each child shares its leading genes with
+            closest = np.empty(self.size, dtype=int)
+            prefixes = np.empty(self.size, dtype=int)
+            closest[:len(elites)] = elites
+            prefixes[:len(elites)] = self.lifespan
+        # the elites go first, unchanged
+        next_genomes[:len(elites)] = self.genomes[elites]
+        elite_fitness = self.fitness[elites]
+        elite_ticks = self.ticks[elites]
+        # breed a block at a time so temporaries stay bounded
+        blocks = list(chunks(children_count, self.breed_block))
+        seeds = spawn_seeds(int(self.rng.integers(2**63)), len(blocks))
+        with self.metrics.timer("breeding"):
+            for (start, stop), block_seed in zip(blocks, seeds):
+                rng = np.random.default_rng(block_seed)
+                pairs = parents[start:stop]
+                start, stop = start + len(elites), stop + len(elites)
+                firsts = self.genomes[pairs[:, 0]]
+                seconds = self.genomes[pairs[:, 1]]
+                children = mutate_genomes(
+                    crossover_genomes(firsts, seconds, rng),
+                    self.mutation_rate, self.magnitude, rng)
+                next_genomes[start:stop] = children
+                if generation is not None:
+                    # children take their leading genes from the second parent
+                    closest[start:stop] = pairs[:, 1]
+                    prefixes[start:stop] = shared_prefix(
+                        next_genomes[start:stop], seconds)
+        # apply the new finders
+        if self.store is not None:
+            self.store.swap()
+            next_genomes = self.store.current
+        else:
+            self.spare_genomes = self.genomes
+        self.set_genomes(next_genomes)
+        self.elite_fitness = elite_fitness
+        self.ticks[:len(elites)] = elite_ticks
+        if generation is not None:
+            self.lineage = (generation, closest, prefixes)
+        self.metrics.end_generation(self)
+
+    def emigrants(self, count):
+        """A function to copy the fittest genomes of the last evaluation
+
+        Args:
+            count (int): the number of genomes to copy
+
+        Returns:
+            tuple: the (count, lifespan, 2) genomes and their fitness
+        """
+        rows = fittest(self.fitness, count)
+        return np.array(self.genomes[rows], dtype=float), self.fitness[rows]
+
+    def immigrate(self, genomes, fitness):
+        """A function to replace the least fit finders of the last
+        evaluation with genomes from elsewhere, before breeding
+
+        Args:
+            genomes (np.ndarray): the (count, lifespan, 2) new genomes
+            fitness (np.ndarray): the (count,) fitness of the new genomes
+        """
+        count = min(len(genomes), self.size)
+        if count == 0:
+            return
+        rows = np.argpartition(self.fitness, count - 1)[:count]
+        self.genomes[rows] = genomes[:count]
+        self.fitness[rows] = fitness[:count]
+        self._engine = None
+        self._finders = None
+        # the trajectories of these rows no longer match their genomes
+        self.trajectory_generation = None
+
+    def snapshot(self, path=None):
+        """A function to copy the state needed to resume the population
+
+        The genomes are always copied, as a store's buffers are bred
+        over by later generations. Given the checkpoint it is for, a
+        population with a store copies them a block at a time into a
+        memory-mapped .npy file next to it rather than into memory. It
+        also records the store's directory, so it can be resumed into it.
+
+        Args:
+            path (str, optional): the checkpoint the snapshot will be
+                written to. Defaults to None, copying into memory.
+
+        Returns:
+            dict: the arrays describing the population
+        """
+        if self.store is not None and path is not None:
+            genomes = np.lib.format.open_memmap(
+                f"{path}.genomes.{self.generation}.npy", mode="w+",
+                dtype=self.genomes.dtype, shape=self.genomes.shape)
+            for start, stop in chunks(self.size, self.copy_block):
+                genomes[start:stop] = self.genomes[start:stop]
+            genomes = {"genomes": genomes}
+        else:
+            genomes = {"genomes": np.array(self.genomes)}
+        if self.store is not None:
+            genomes["store"] = np.array(self.store.directory)
+        return {
+            **genomes,
+            "fitness_history": np.array(self.fitness_history,
+                                        dtype=float).reshape(-1, 2),
+            "generation": np.array(self.generation),
+            "rng_state": rng_to_array(self.rng),
+            "start_position": np.array([self.start_position.x(),
+                                        self.start_position.y()]),
+            "mutation_rate": np.array(self.mutation_rate),
+            "magnitude": np.array(self.magnitude),
+        }
+
+    def save(self, path):
+        """A function to save the population to a .npz checkpoint
+
+        Args:
+            path (str): the file to write
+        """
+        write_checkpoint(path, self.snapshot(path))
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """A function to resume a population from a .npz checkpoint
+
+        Args:
+            path (str): the file to read
+            **kwargs: other Population arguments, such as a renderer or
+                an evaluator
+
+        Returns:
+            Population: the population, ready for its next generation
+        """
+        checkpoint = read_checkpoint(path)
+        genomes = checkpoint["genomes"]
+        if "store" in checkpoint and "store" not in kwargs:
+            kwargs["store"] = GenomeStore.open(str(checkpoint["store"]))
+        store = kwargs.get("store")
+        if store is not None:
+            # the store may hold later generations, put the saved one back
+            for start, stop in chunks(len(genomes), cls.copy_block):
+                store.current[start:stop] = genomes[start:stop]
+            store.flush()
+            genomes = store.current
+        else:
+            genomes = np.array(genomes, dtype=float)
+        population = cls(
+            size=genomes.shape[0],
+            lifespan=genomes.shape[1],
+            start_position=Vector(checkpoint["start_position"]),
+            mutation_rate=float(checkpoint["mutation_rate"]),
+            magnitude=checkpoint["magnitude"].item(),
+            seed=rng_from_array(checkpoint["rng_state"]),
+            genomes=genomes,
+            **kwargs
+        )
+        population.generation = int(checkpoint["generation"])
+        population.fitness_history = [
+            tuple(row) for row in checkpoint["fitness_history"].tolist()]
+        return population
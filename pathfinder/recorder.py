@@ -0,0 +1,264 @@
+"""
+# recorder.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file records the paths of selected finders, one .npz
+#   file per generation, and plays recordings back in a window
+#   without simulating anything.
+"""
+
+import glob
+import os
+import time
+
+import numpy as np
+
+from pathfinder.checkpoint import write_checkpoint
+from pathfinder.engine import Engine
+from pathfinder.selection import fittest
+
+
+class Recorder:
+    # which finders can be recorded
+    selections = ("best", "sample", "all")
+
+    def __init__(self, directory, select="best", count=10, seed=None,
+                 compress=False):
+        """Recorder constructor
+
+        A recorder is given to a Population, which calls it after every
+        evaluation. Positions of a sample or of all finders are copied as
+        the evaluation runs when the population simulates its whole
+        engine. Otherwise, and always for the fittest, the chosen finders
+        are run again for as many ticks as they were evaluated.
+        Their position after every tick is kept as float32.
+
+        Args:
+            directory (str): the directory to write recordings to
+            select (str, optional): "best" for the fittest finders,
+                "sample" for a random few or "all". Defaults to "best".
+            count (int, optional): the number of finders to record, unless
+                recording all. Defaults to 10.
+            seed (int, optional): the seed for picking a sample.
+                Defaults to None.
+            compress (bool, optional): whether to compress the files.
+                Defaults to False.
+        """
+        if select not in self.selections:
+            raise ValueError(f"unknown selection: {select}")
+        self.directory = directory
+        self.select = select
+        self.count = count
+        self.rng = np.random.default_rng(seed)
+        self.compress = compress
+        # the positions of the finders watched during an evaluation
+        self.buffer = np.zeros((0, 0, 2), dtype=np.float32)
+        self.watched = None
+        self.ticks = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, generation):
+        """A function to get the file a generation is recorded to
+
+        Args:
+            generation (int): the generation
+
+        Returns:
+            str: the path of the recording
+        """
+        return os.path.join(self.directory, f"generation_{generation:06d}.npz")
+
+    def select_rows(self, population):
+        """A function to pick the finders to record
+
+        Args:
+            population (Population): the population just evaluated
+
+        Returns:
+            np.ndarray: the rows of the finders, in order
+        """
+        if self.select == "all":
+            return np.arange(population.size)
+        count = min(self.count, population.size)
+        if self.select == "best":
+            return fittest(population.fitness, count)
+        return np.sort(self.rng.choice(population.size, count, replace=False))
+
+    def watch(self, population):
+        """A function to start recording an evaluation as it runs
+
+        Called by a Population that simulates its whole engine at once,
+        before the run. The positions of the sampled finders, or of all
+        of them, are copied after every tick. The fittest are not known
+        until the run is over, so they are run again instead.
+
+        Args:
+            population (Population): the population about to be evaluated
+
+        Returns:
+            callable: the observer to give Engine.run, None when recording
+                the fittest
+        """
+        if self.select == "best":
+            return None
+        engine = population.engine
+        if self.select == "sample":
+            self.watched = self.select_rows(population)
+        else:
+            self.watched = np.arange(population.size)
+        shape = (engine.lifespan + 2, len(self.watched), 2)
+        if self.buffer.shape != shape:
+            self.buffer = np.zeros(shape, dtype=np.float32)
+        self.buffer[0] = engine.positions[self.watched]
+        self.ticks = 0
+        return self.capture
+
+    def capture(self, engine):
+        """A function to copy the watched positions after a tick
+
+        Args:
+            engine (Engine): the engine being run
+        """
+        self.ticks += 1
+        self.buffer[self.ticks] = engine.positions[self.watched]
+
+    def rerun(self, population, environment, rows):
+        """A function to run finders again exactly as they were evaluated
+
+        Each finder only moves for as many ticks as its evaluation ran,
+        so runs cut short by min_alive_fraction end the same way.
+
+        Args:
+            population (Population): the population
+            environment (Environment): the Environment it was run in
+            rows (np.ndarray): the rows of the finders to run
+
+        Returns:
+            tuple: the (ticks, finders, 2) positions, and the engine
+        """
+        engine = Engine(np.asarray(population.genomes[rows], dtype=float),
+                        population.start_position)
+        limits = population.ticks[rows]
+        positions = np.zeros((engine.lifespan + 2, len(rows), 2),
+                             dtype=np.float32)
+        positions[0] = engine.positions
+        ticks = 0
+        while True:
+            engine.active = engine.active[limits[engine.active] > ticks]
+            if engine.finished():
+                break
+            engine.step(environment)
+            ticks += 1
+            positions[ticks] = engine.positions
+        return positions[:ticks + 1], engine
+
+    def record(self, population, environment):
+        """A function to record a generation that was just evaluated
+
+        Finders watched during the evaluation keep the positions they had
+        in it. The rest, such as carried elites, are run again.
+
+        Args:
+            population (Population): the population
+            environment (Environment): the Environment it was run in
+        """
+        watched, self.watched = self.watched, None
+        if watched is None:
+            rows = self.select_rows(population)
+            live = np.zeros(len(rows), dtype=bool)
+        else:
+            rows = watched if self.select == "sample" \
+                else self.select_rows(population)
+            live = rows >= len(population.elite_fitness)
+        rerun, engine = self.rerun(population, environment, rows[~live])
+        ticks = len(rerun) - 1
+        if live.any():
+            ticks = max(ticks, self.ticks)
+            # the watched rows are sorted, so live rows can be found in them
+            captured = self.buffer[:self.ticks + 1,
+                                   np.searchsorted(watched, rows[live])]
+        positions = np.empty((ticks + 1, len(rows), 2), dtype=np.float32)
+        # finders stay where they stopped until the last tick
+        positions[:len(rerun), ~live] = rerun
+        positions[len(rerun):, ~live] = rerun[-1]
+        if live.any():
+            positions[:len(captured), live] = captured
+            positions[len(captured):, live] = captured[-1]
+        outcomes = {}
+        for name in ("alive_durations", "crashed", "completed"):
+            values = np.empty(len(rows), dtype=getattr(engine, name).dtype)
+            values[~live] = getattr(engine, name)
+            if live.any():
+                values[live] = getattr(population.engine, name)[rows[live]]
+            outcomes[name] = values
+        recording = {
+            "positions": positions,
+            "rows": rows,
+            "fitness": population.fitness[rows],
+            **outcomes,
+            "generation": np.array(population.generation),
+        }
+        write_checkpoint(self.path(population.generation), recording,
+                         self.compress)
+
+
+def read_recording(path):
+    """A function to read a recording of a generation
+
+    Args:
+        path (str): the file to read
+
+    Returns:
+        dict: the recorded arrays, positions being (ticks, finders, 2)
+    """
+    with np.load(path) as recording:
+        return {name: recording[name] for name in recording.files}
+
+
+def list_recordings(path):
+    """A function to find recordings, in generation order
+
+    Args:
+        path (str): a recording, or a directory of recordings
+
+    Returns:
+        list: the paths of the recordings
+    """
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "generation_*.npz")))
+    return [path]
+
+
+def replay(paths, renderer, fps=60, update=None, is_closed=None):
+    """A function to play recordings back, tick by tick
+
+    Args:
+        paths (list): the recordings to play, in order
+        renderer (FrameRenderer): the renderer to draw the ticks with
+        fps (float, optional): the ticks drawn per second. Defaults to 60.
+        update (callable, optional): a function to flush the window after
+            each tick. Defaults to None.
+        is_closed (callable, optional): a function returning true once the
+            window was closed. Defaults to None.
+    """
+    from pathfinder.render import Frame
+    frame_time = 1/fps
+    for path in paths:
+        recording = read_recording(path)
+        generation = int(recording["generation"])
+        readout = (f"Generation {generation}, best recorded fitness: "
+                   f"{recording['fitness'].max():.3f}")
+        alive_durations = recording["alive_durations"]
+        for tick, positions in enumerate(recording["positions"]):
+            if is_closed is not None and is_closed():
+                return
+            started = time.perf_counter()
+            # finders show how they ended once they stop moving
+            stopped = tick >= alive_durations
+            renderer.draw_frame(Frame(
+                generation, positions.astype(float),
+                recording["crashed"] & stopped,
+                recording["completed"] & stopped, readout))
+            if update is not None:
+                update()
+            time.sleep(max(0, frame_time - (time.perf_counter() - started)))
@@ -0,0 +1,238 @@
+"""
+# render.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file contains the renderers used to display a population.
+#   The base Renderer draws nothing, so a population can run
+#   headless without creating any Tk objects.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+# a copy of a population's state, drawn by FrameRenderer
+Frame = namedtuple(
+    "Frame", ["generation", "positions", "crashed", "completed", "readout"])
+
+
+class Renderer:
+    """A renderer that draws nothing, used for headless runs"""
+
+    def show_environment(self, environment):
+        """A function to display an environment
+
+        Args:
+            environment (Environment): the environment to display
+        """
+
+    def start_generation(self, population):
+        """A function to display the finders of a new generation
+
+        Args:
+            population (Population): the population being run
+        """
+
+    def draw(self, population, moved, stopped):
+        """A function to display a step of the population
+
+        Args:
+            population (Population): the population being run
+            moved (np.ndarray): the indices of the finders that moved
+            stopped (np.ndarray): the indices of the finders that crashed
+                or completed this step
+        """
+
+    def show_readout(self, text):
+        """A function to display a line of text about the population
+
+        Args:
+            text (str): the text to display
+        """
+
+
+def state_colors(crashed, completed):
+    """A function to get the fill color of finders from their state
+
+    Args:
+        crashed (np.ndarray): a (N,) boolean mask of crashed finders
+        completed (np.ndarray): a (N,) boolean mask of completed finders
+
+    Returns:
+        np.ndarray: the (N,) fill colors, completion showing over crashing
+    """
+    colors = np.where(crashed, "pink", "red")
+    return np.where(completed, "yellow", colors)
+
+
+class ShapePool:
+    def __init__(self, window, radius=5):
+        """ShapePool constructor
+
+        A pool keeps one circle per finder drawn in the window and reuses
+        them from generation to generation, so canvas items never pile up.
+        Shapes are only moved or recolored when that changes something.
+
+        Args:
+            window (GraphWin): a window to draw the shapes in
+            radius (int, optional): the radius of each circle. Defaults to 5.
+        """
+        self.window = window
+        self.radius = radius
+        self.shapes = []
+        self.positions = np.zeros((0, 2))
+        self.colors = np.zeros(0, dtype=object)
+
+    def reset(self, positions):
+        """A function to place one red circle at each position, reusing
+        the circles drawn before and undrawing any left over
+
+        Args:
+            positions (np.ndarray): a (N, 2) array of positions
+        """
+        from graphics import Circle, Point
+        count = len(positions)
+        for shape in self.shapes[count:]:
+            shape.undraw()
+        del self.shapes[count:]
+        kept = len(self.shapes)
+        self.positions = self.positions[:kept]
+        self.colors = self.colors[:kept]
+        self.move_to(np.arange(kept), positions[:kept])
+        self.fill(np.arange(kept), np.full(kept, "red", dtype=object))
+        for x, y in positions[kept:]:
+            shape = Circle(Point(x, y), self.radius)
+            shape.setFill("red")
+            shape.draw(self.window)
+            self.shapes.append(shape)
+        self.positions = np.array(positions, dtype=float)
+        self.colors = np.full(count, "red", dtype=object)
+
+    def move_to(self, indices, positions):
+        """A function to move circles to new positions
+
+        Args:
+            indices (np.ndarray): the circles to move
+            positions (np.ndarray): a (len(indices), 2) array of positions
+        """
+        offsets = positions - self.positions[indices]
+        changed = (offsets != 0).any(axis=1)
+        for index, (x, y) in zip(indices[changed], offsets[changed]):
+            self.shapes[index].move(x, y)
+        self.positions[indices] = positions
+
+    def fill(self, indices, colors):
+        """A function to recolor circles
+
+        Args:
+            indices (np.ndarray): the circles to recolor
+            colors (np.ndarray): the new color of each
+        """
+        changed = self.colors[indices] != colors
+        for index, color in zip(indices[changed], colors[changed]):
+            self.shapes[index].setFill(color)
+        self.colors[indices] = colors
+
+    def clear(self):
+        """A function to undraw every circle"""
+        self.reset(np.zeros((0, 2)))
+
+
+class GraphicsRenderer(Renderer):
+    def __init__(self, window):
+        """GraphicsRenderer constructor
+
+        Args:
+            window (GraphWin): a window to draw the population in
+        """
+        # graphics is only imported once something is displayed
+        from graphics import Point, Text
+        self.window = window
+        self.pool = ShapePool(window)
+        # create a readout of fitness
+        self.readout = Text(Point(250, 520), "")
+        self.readout.draw(window)
+
+    def show_environment(self, environment):
+        """A function to display an environment
+
+        Args:
+            environment (Environment): the environment to display
+        """
+        environment.show(self.window)
+
+    def start_generation(self, population):
+        """A function to display the finders of a new generation
+
+        Args:
+            population (Population): the population being run
+        """
+        self.pool.reset(population.engine.positions)
+
+    def draw(self, population, moved, stopped):
+        """A function to display a step of the population
+
+        Only the finders that moved or stopped are touched.
+
+        Args:
+            population (Population): the population being run
+            moved (np.ndarray): the indices of the finders that moved
+            stopped (np.ndarray): the indices of the finders that crashed
+                or completed this step
+        """
+        engine = population.engine
+        self.pool.move_to(moved, engine.positions[moved])
+        self.pool.fill(stopped, state_colors(engine.crashed[stopped],
+                                             engine.completed[stopped]))
+
+    def show_readout(self, text):
+        """A function to display a line of text about the population
+
+        Args:
+            text (str): the text to display
+        """
+        self.readout.setText(text)
+
+
+class FrameRenderer:
+    def __init__(self, window):
+        """FrameRenderer constructor
+
+        A frame renderer draws frames copied from a population running
+        elsewhere, so drawing never holds up the simulation. Finders are
+        moved straight to where the newest frame has them.
+
+        Args:
+            window (GraphWin): a window to draw the frames in
+        """
+        # graphics is only imported once something is displayed
+        from graphics import Point, Text
+        self.window = window
+        self.generation = None
+        self.pool = ShapePool(window)
+        # create a readout of fitness
+        self.readout = Text(Point(250, 520), "")
+        self.readout.draw(window)
+
+    def show_environment(self, environment):
+        """A function to display an environment
+
+        Args:
+            environment (Environment): the environment to display
+        """
+        environment.show(self.window)
+
+    def draw_frame(self, frame):
+        """A function to display a frame, touching only what changed
+
+        Args:
+            frame (Frame): the frame to display
+        """
+        if frame.generation != self.generation:
+            # the finders of a new generation start from scratch
+            self.pool.reset(frame.positions)
+            self.generation = frame.generation
+        indices = np.arange(len(frame.positions))
+        self.pool.move_to(indices, frame.positions)
+        self.pool.fill(indices, state_colors(frame.crashed, frame.completed))
+        self.readout.setText(frame.readout)
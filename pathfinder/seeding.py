@@ -0,0 +1,67 @@
+"""
+# seeding.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file handles randomness. Everything random draws from
+#   a numpy Generator that is passed in, or from the default
+#   generator here when none is given, so runs can be seeded.
+"""
+
+import numpy as np
+
+_default_rng = np.random.default_rng()
+
+
+def seed(value=None):
+    """A function to reseed the default generator
+
+    Args:
+        value (int OR np.random.SeedSequence, optional): the seed.
+            Defaults to None, seeding from the operating system.
+    """
+    global _default_rng
+    _default_rng = np.random.default_rng(value)
+
+
+def get_rng(rng=None):
+    """A function to get the generator to draw from
+
+    Args:
+        rng (np.random.Generator, optional): a generator that was passed in.
+            Defaults to None, using the default generator.
+
+    Returns:
+        np.random.Generator: the generator to draw from
+    """
+    return _default_rng if rng is None else rng
+
+
+def make_rng(value=None):
+    """A function to make a generator from a seed
+
+    Args:
+        value (int OR np.random.SeedSequence OR np.random.Generator,
+            optional): the seed, or a generator to use as is.
+            Defaults to None, seeding from the operating system.
+
+    Returns:
+        np.random.Generator: the seeded generator
+    """
+    if isinstance(value, np.random.Generator):
+        return value
+    return np.random.default_rng(value)
+
+
+def spawn_seeds(value, count):
+    """A function to spawn independent seeds from one root seed
+
+    Args:
+        value (int OR np.random.SeedSequence): the root seed
+        count (int): the number of seeds to spawn
+
+    Returns:
+        list: count independent np.random.SeedSequence children
+    """
+    if not isinstance(value, np.random.SeedSequence):
+        value = np.random.SeedSequence(value)
+    return value.spawn(count)
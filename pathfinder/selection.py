@@ -0,0 +1,163 @@
+"""
+# selection.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file contains the selection operators, which pick the
+#   parents of a generation from the fitness of the last one.
+#   Every operator draws all of the parents in one call.
+"""
+
+import numpy as np
+
+from pathfinder.seeding import get_rng
+
+
+def fittest(fitness, count):
+    """A function to find the fittest finders without sorting them all
+
+    Args:
+        fitness (np.ndarray): the (size,) fitness of the finders
+        count (int): the number of finders to find
+
+    Returns:
+        np.ndarray: the indices of the fittest finders, best first
+    """
+    count = min(count, len(fitness))
+    top = np.argpartition(-fitness, count - 1)[:count]
+    # order just the selected few, breaking ties by index
+    return top[np.lexsort((top, -fitness[top]))]
+
+
+def sample_weights(weights, count, rng=None):
+    """A function to draw indices with probability proportional to weights
+
+    Args:
+        weights (np.ndarray): the (size,) non-negative weights
+        count (int): the number of indices to draw
+        rng (np.random.Generator, optional): the generator to draw from.
+            Defaults to None, using the default generator.
+
+    Returns:
+        np.ndarray: the (count,) drawn indices
+    """
+    totals = np.cumsum(weights)
+    if totals[-1] <= 0:
+        # every weight is zero, so draw uniformly
+        return get_rng(rng).integers(0, len(weights), count)
+    points = get_rng(rng).random(count) * totals[-1]
+    return np.searchsorted(totals, points, side='right')
+
+
+class Selection:
+    """A selection operator, the base class draws parents uniformly"""
+
+    def select(self, fitness, count, rng=None):
+        """A function to draw parents from a generation
+
+        Args:
+            fitness (np.ndarray): the (size,) fitness of the finders
+            count (int): the number of parents to draw
+            rng (np.random.Generator, optional): the generator to draw from.
+                Defaults to None, using the default generator.
+
+        Returns:
+            np.ndarray: the (count,) indices of the parents
+        """
+        return get_rng(rng).integers(0, len(fitness), count)
+
+
+class TruncationSelection(Selection):
+    def __init__(self, fraction=0.5):
+        """TruncationSelection constructor
+
+        Parents are drawn uniformly from the fittest fraction of the
+        generation, plus one.
+
+        Args:
+            fraction (float, optional): the part of the generation allowed
+                to breed. Defaults to 0.5.
+        """
+        self.fraction = fraction
+
+    def select(self, fitness, count, rng=None):
+        # the lucky finders who will continue on
+        cutoff = int(np.ceil(len(fitness) * self.fraction))
+        mating_pool = fittest(fitness, cutoff + 1)
+        return get_rng(rng).choice(mating_pool, count)
+
+
+class TournamentSelection(Selection):
+    def __init__(self, size=2):
+        """TournamentSelection constructor
+
+        Each parent is the fittest of size finders drawn at random.
+
+        Args:
+            size (int, optional): the finders in each tournament.
+                Defaults to 2.
+        """
+        self.size = size
+
+    def select(self, fitness, count, rng=None):
+        entrants = get_rng(rng).integers(0, len(fitness), (count, self.size))
+        winners = np.argmax(fitness[entrants], axis=1)
+        return entrants[np.arange(count), winners]
+
+
+class RouletteSelection(Selection):
+    """Parents are drawn with probability proportional to fitness, shifted
+    so the least fit finder has no chance
+    """
+
+    def select(self, fitness, count, rng=None):
+        return sample_weights(fitness - fitness.min(), count, rng)
+
+
+class StochasticUniversalSampling(Selection):
+    """Parents are picked by evenly spaced pointers over the same wheel as
+    RouletteSelection, so each finder is picked close to its expected
+    number of times
+    """
+
+    def select(self, fitness, count, rng=None):
+        rng = get_rng(rng)
+        totals = np.cumsum(fitness - fitness.min())
+        if totals[-1] <= 0:
+            return rng.integers(0, len(fitness), count)
+        spacing = totals[-1] / count
+        points = (rng.random() + np.arange(count)) * spacing
+        # shuffle, as the pointers pick parents in order
+        return rng.permutation(np.searchsorted(totals, points, side='right'))
+
+
+class RankSelection(Selection):
+    def __init__(self, pressure=1.5):
+        """RankSelection constructor
+
+        Parents are drawn with probability falling linearly with their
+        rank, so only the order of fitness matters, not its scale.
+
+        Args:
+            pressure (float, optional): the expected number of picks of
+                the fittest finder, between 1 and 2. Defaults to 1.5.
+        """
+        self.pressure = pressure
+
+    def select(self, fitness, count, rng=None):
+        size = len(fitness)
+        order = np.argsort(fitness, kind='stable')
+        if size == 1:
+            return np.zeros(count, dtype=int)
+        # linear ranking, the least fit finder has rank 0
+        weights = (2 - self.pressure) / size + (
+            2 * np.arange(size) * (self.pressure - 1) / (size * (size - 1)))
+        return order[sample_weights(weights, count, rng)]
+
+
+SELECTIONS = {
+    "truncation": TruncationSelection,
+    "tournament": TournamentSelection,
+    "roulette": RouletteSelection,
+    "sus": StochasticUniversalSampling,
+    "rank": RankSelection,
+}
@@ -0,0 +1,94 @@
+"""
+# spatial.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file contains the uniform grid used to index walls,
+#   so a movement segment is only tested against the walls
+#   in the cells it passes through.
+"""
+
+import numpy as np
+
+
+def expand(counts):
+    """A function to expand per-item counts into flat item and offset arrays
+
+    Args:
+        counts (np.ndarray): the number of entries for each item
+
+    Returns:
+        tuple: the item of every entry, and the entry's offset within it
+    """
+    items = np.repeat(np.arange(len(counts)), counts)
+    starts = np.cumsum(counts) - counts
+    offsets = np.arange(len(items)) - starts[items]
+    return items, offsets
+
+
+class WallGrid:
+    def __init__(self, wall_matrix, cells_per_side=None):
+        """WallGrid constructor
+
+        Args:
+            wall_matrix (np.ndarray): a (W, 4) array of wall start and end
+                points as x1, y1, x2, y2
+            cells_per_side (int, optional): the number of cells along each
+                axis. Defaults to None, picking about one cell per wall
+                along each axis, up to 256.
+        """
+        if cells_per_side is None:
+            cells_per_side = int(np.clip(np.ceil(np.sqrt(len(wall_matrix))),
+                                         1, 256))
+        self.cells_per_side = cells_per_side
+        points = wall_matrix.reshape(-1, 2)
+        self.origin = points.min(axis=0) if len(points) else np.zeros(2)
+        extent = points.max(axis=0) - self.origin if len(points) else 0
+        self.cell_size = np.maximum(extent / cells_per_side, 1e-9)
+        # register every wall in each cell its bounding box covers
+        walls, cells = self.query_cells(wall_matrix[:, 0:2],
+                                        wall_matrix[:, 2:4])
+        order = np.argsort(cells, kind='stable')
+        self.cell_walls = walls[order]
+        self.cell_starts = np.searchsorted(
+            cells[order], np.arange(cells_per_side * cells_per_side + 1))
+
+    def query_cells(self, starts, ends):
+        """A function to find the cells covered by the bounding box of
+        each segment, clipped to the grid
+
+        Args:
+            starts (np.ndarray): a (N, 2) array of segment start points
+            ends (np.ndarray): a (N, 2) array of segment end points
+
+        Returns:
+            tuple: the segment and cell index of every covered cell
+        """
+        last = self.cells_per_side - 1
+        low = np.floor((np.minimum(starts, ends) - self.origin)
+                       / self.cell_size)
+        high = np.floor((np.maximum(starts, ends) - self.origin)
+                        / self.cell_size)
+        low = np.clip(low, 0, last).astype(int)
+        high = np.clip(high, 0, last).astype(int)
+        spans = high - low + 1
+        segments, offsets = expand(spans[:, 0] * spans[:, 1])
+        columns = low[segments, 0] + offsets % spans[segments, 0]
+        rows = low[segments, 1] + offsets // spans[segments, 0]
+        return segments, rows * self.cells_per_side + columns
+
+    def query(self, starts, ends):
+        """A function to find the walls each segment might cross
+
+        Args:
+            starts (np.ndarray): a (N, 2) array of segment start points
+            ends (np.ndarray): a (N, 2) array of segment end points
+
+        Returns:
+            tuple: the segment and wall index of every candidate pair,
+                a pair may be listed more than once
+        """
+        segments, cells = self.query_cells(starts, ends)
+        counts = self.cell_starts[cells + 1] - self.cell_starts[cells]
+        entries, offsets = expand(counts)
+        walls = self.cell_walls[self.cell_starts[cells[entries]] + offsets]
+        return segments[entries], walls
@@ -0,0 +1,86 @@
+"""
+# stopping.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file contains the stopping criteria, which end a run
+#   of many generations early once it has found a solution,
+#   stopped improving or used up its time.
+"""
+
+import time
+
+
+class StoppingCriterion:
+    """A stopping criterion, the base class never stops a run"""
+
+    def start(self, population):
+        """A function called once before a run starts
+
+        Args:
+            population (Population): the population being run
+        """
+
+    def should_stop(self, population, environment):
+        """A function to test if a run should stop, after each generation
+
+        Args:
+            population (Population): the population being run
+            environment (Environment): the Environment it is run in
+
+        Returns:
+            bool: true if the run should stop
+        """
+        return False
+
+
+class TargetCompletion(StoppingCriterion):
+    def __init__(self, rate=0.5):
+        """TargetCompletion constructor
+
+        Args:
+            rate (float, optional): the part of a generation that has to
+                reach the target. Defaults to 0.5.
+        """
+        self.rate = rate
+
+    def should_stop(self, population, environment):
+        return population.completion_rate(environment) >= self.rate
+
+
+class FitnessPlateau(StoppingCriterion):
+    def __init__(self, generations=20, tolerance=0.0):
+        """FitnessPlateau constructor
+
+        Args:
+            generations (int, optional): the number of generations the best
+                fitness has to stop improving for. Defaults to 20.
+            tolerance (float, optional): the improvement that still counts
+                as none. Defaults to 0.0.
+        """
+        self.generations = generations
+        self.tolerance = tolerance
+
+    def should_stop(self, population, environment):
+        best = [best for _, best in population.fitness_history]
+        if len(best) <= self.generations:
+            return False
+        recent = max(best[-self.generations:])
+        return recent <= max(best[:-self.generations]) + self.tolerance
+
+
+class TimeBudget(StoppingCriterion):
+    def __init__(self, seconds):
+        """TimeBudget constructor
+
+        Args:
+            seconds (float): the wall-clock time a run may take, checked
+                after each generation
+        """
+        self.seconds = seconds
+        self.started = None
+
+    def start(self, population):
+        self.started = time.perf_counter()
+
+    def should_stop(self, population, environment):
+        return time.perf_counter() - self.started >= self.seconds
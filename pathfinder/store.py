@@ -0,0 +1,154 @@
+"""
+# store.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file contains the genome store, which keeps a
+#   population's genomes on disk in memory-mapped float32
+#   files, so population size is limited by disk, not RAM.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from pathfinder.chromosome import random_genomes
+
+
+def chunks(size, chunk_size=None):
+    """A function to split a population into chunks of genomes
+
+    Args:
+        size (int): the number of genomes
+        chunk_size (int, optional): the number of genomes in each chunk.
+            Defaults to None, making a single chunk.
+
+    Yields:
+        tuple: the start and stop index of each chunk
+    """
+    chunk_size = chunk_size or max(size, 1)
+    for start in range(0, size, chunk_size):
+        yield start, min(start + chunk_size, size)
+
+
+class GenomeStore:
+    # the name of the file describing the store
+    metadata_name = "store.json"
+
+    def __init__(self, directory, size, lifespan, current=0, mode="r+"):
+        """GenomeStore constructor
+
+        A store holds two (size, lifespan, 2) genome files: the current
+        generation and a buffer the next generation is bred into. Use
+        GenomeStore.create or GenomeStore.open rather than this directly.
+
+        Args:
+            directory (str): the directory holding the store
+            size (int): the number of genomes
+            lifespan (int): the number of genes in each genome
+            current (int, optional): which of the two files holds the
+                current generation. Defaults to 0.
+            mode (str, optional): the numpy.memmap mode to open the files
+                with. Defaults to "r+".
+        """
+        self.directory = directory
+        self.size = size
+        self.lifespan = lifespan
+        self.current_index = current
+        self.buffers = [
+            np.memmap(self.buffer_path(index), dtype=np.float32, mode=mode,
+                      shape=(size, lifespan, 2))
+            for index in range(2)
+        ]
+
+    @classmethod
+    def create(cls, directory, size, lifespan, magnitude=1, rng=None,
+               chunk_size=65536):
+        """A function to create a store filled with random genomes
+
+        Args:
+            directory (str): the directory to create the store in
+            size (int): the number of genomes
+            lifespan (int): the number of genes in each genome
+            magnitude (int, optional): the magnitude of every gene.
+                Defaults to 1.
+            rng (np.random.Generator, optional): the generator to draw from.
+                Defaults to None, using the default generator.
+            chunk_size (int, optional): the number of genomes made at a
+                time. Defaults to 65536.
+
+        Returns:
+            GenomeStore: the new store
+        """
+        os.makedirs(directory, exist_ok=True)
+        store = cls(directory, size, lifespan, mode="w+")
+        for start, stop in chunks(size, chunk_size):
+            store.current[start:stop] = random_genomes(
+                stop - start, lifespan, magnitude, rng)
+        store.flush()
+        return store
+
+    @classmethod
+    def open(cls, directory):
+        """A function to open an existing store
+
+        Args:
+            directory (str): the directory holding the store
+
+        Returns:
+            GenomeStore: the opened store
+        """
+        path = os.path.join(directory, cls.metadata_name)
+        with open(path, encoding="utf-8") as file:
+            metadata = json.load(file)
+        return cls(directory, metadata["size"], metadata["lifespan"],
+                   metadata["current"])
+
+    def buffer_path(self, index):
+        """A function to get the path of one of the genome files
+
+        Args:
+            index (int): which of the two files
+
+        Returns:
+            str: the path of the file
+        """
+        return os.path.join(self.directory, f"genomes.{index}.f32")
+
+    @property
+    def current(self):
+        """The genomes of the current generation
+
+        Returns:
+            np.memmap: the (size, lifespan, 2) current genomes
+        """
+        return self.buffers[self.current_index]
+
+    @property
+    def next(self):
+        """The buffer the next generation is bred into
+
+        Returns:
+            np.memmap: the (size, lifespan, 2) next genomes
+        """
+        return self.buffers[1 - self.current_index]
+
+    def swap(self):
+        """A function to make the next generation the current one"""
+        self.next.flush()
+        self.current_index = 1 - self.current_index
+        self.write_metadata()
+
+    def flush(self):
+        """A function to write the current generation to disk"""
+        self.current.flush()
+        self.write_metadata()
+
+    def write_metadata(self):
+        """A function to record which file holds the current generation"""
+        path = os.path.join(self.directory, self.metadata_name)
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump({"size": self.size, "lifespan": self.lifespan,
+                       "current": self.current_index}, file)
+        os.replace(temporary_path, path)
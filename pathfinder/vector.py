@@ -6,62 +6,121 @@
 #   this project: position, velocity and acceleration, as
 #   well as storing each sequence in a chromosome. This class
 #   contains useful functions for working with vectors.
+#   Vectors hold two floats, numpy is only used to draw
+#   random vectors and to convert to and from arrays.
 """
 
-import random
 from math import sqrt
 
 import numpy as np
 
+from pathfinder.seeding import get_rng
 
-def make_random_vector():
+
+def make_random_vector(rng=None):
     """A function to create a random numpy vector
 
+    Args:
+        rng (np.random.Generator, optional): the generator to draw from.
+            Defaults to None, using the default generator.
+
     Returns:
         numpy.ndarray: a random numpy vector
     """
-    return random.uniform(-1, 1) * np.random.random((1, 2))[0]
+    return make_random_vectors((), rng)
+
+
+def make_random_vectors(shape, rng=None):
+    """A function to create an array of random vectors at once
+
+    Args:
+        shape (tuple): the shape of the array of vectors
+        rng (np.random.Generator, optional): the generator to draw from.
+            Defaults to None, using the default generator.
+
+    Returns:
+        numpy.ndarray: a (*shape, 2) array of random vectors
+    """
+    rng = get_rng(rng)
+    shape = tuple(shape)
+    return rng.uniform(-1, 1, shape + (1,)) * rng.random(shape + (2,))
 
 
 class Vector:
-    def __init__(self, array=np.array([0, 0]), random=False):
+    __slots__ = ("_x", "_y")
+
+    def __init__(self, array=(0, 0), random=False):
         """Vector constructor
 
         Args:
             array (Vector OR np.ndarray OR list, optional): values to
-                initalize the vector. Defaults to np.array([0, 0]).
+                initalize the vector. Defaults to (0, 0).
             random (bool, optional): if true, will create a random vector.
                 Defaults to False.
+        """
+        if random:
+            array = make_random_vector()
+        elif isinstance(array, Vector):
+            array = (array._x, array._y)
+        elif not isinstance(array, (np.ndarray, list, tuple)):
+            raise TypeError(f"cannot make a vector from {type(array)}")
+        self._x = float(array[0])
+        self._y = float(array[1])
+
+    @classmethod
+    def from_xy(cls, x, y):
+        """A function to create a vector from its components
+
+        Args:
+            x (float): the x component of the vector
+            y (float): the y component of the vector
 
         Returns:
-            _type_: _description_
+            Vector: the new vector
         """
-        if(random):
-            self.value = make_random_vector()
-        elif isinstance(array, Vector):
-            self.value = array.value
-        elif isinstance(array, np.ndarray):
-            self.value = array
-        elif isinstance(array, list):
-            self.value = np.array(array)
-        else:
-            return NotImplemented
+        vector = cls.__new__(cls)
+        vector._x = x
+        vector._y = y
+        return vector
+
+    @property
+    def value(self):
+        """The vector as a numpy array
+
+        Returns:
+            np.ndarray: a (2,) array of the x and y components
+        """
+        return np.array((self._x, self._y))
 
     def x(self):
         """a function to get the x component of the vector
 
         Returns:
-            int: the x component of the vector
+            float: the x component of the vector
         """
-        return self.value[0]
+        return self._x
 
     def y(self):
         """a function to get the y component of the vector
 
         Returns:
-            int: the y component of the vector
+            float: the y component of the vector
         """
-        return self.value[1]
+        return self._y
+
+    def set(self, x, y):
+        """A function to set both components of the vector in place
+
+        Args:
+            x (float): the new x component
+            y (float): the new y component
+
+        Returns:
+            Vector: the vector
+        """
+        self._x = float(x)
+        self._y = float(y)
+        return self
 
     def normalize(self):
         """A function to normalize a vector
@@ -69,8 +128,10 @@ class Vector:
         Returns:
             Vector: the normalized vector
         """
-        if not np.array_equal(self.value, np.array([0, 0])):
-            self.value = (self.value) / np.linalg.norm(self.value)
+        magnitude = self.magnitude()
+        if magnitude != 0:
+            self._x /= magnitude
+            self._y /= magnitude
         return self
 
     def average_with(self, other):
@@ -82,7 +143,8 @@ class Vector:
         Returns:
             Vector: the averaged vector
         """
-        return Vector((self + other) / 2)
+        return Vector.from_xy((self._x + other._x) / 2,
+                              (self._y + other._y) / 2)
 
     def distance_from(self, other):
         """A function to find the distance between vectors
@@ -94,8 +156,8 @@ class Vector:
             float: the distance from the other vector
         """
         # sub = (self - other)
-        # return sub.magnitude() # slower (see distance_calc_timing.py)
-        return sqrt((self.x() - other.x()) ** 2 + (self.y() - other.y()) ** 2)
+        # return sub.magnitude() # slower, allocates a vector
+        return sqrt((self._x - other._x) ** 2 + (self._y - other._y) ** 2)
 
     def magnitude(self):
         """A function to retrieve the magnitude of the vector
@@ -103,7 +165,7 @@ class Vector:
         Returns:
             float: the vector's magnitude
         """
-        return sqrt(self.x()*self.x() + self.y()*self.y())
+        return sqrt(self._x*self._x + self._y*self._y)
 
     def cross(self, other):
         """A function to calculate the cross product of two vectors
@@ -112,10 +174,10 @@ class Vector:
             other (Vector): the vector to cross with
 
         Returns:
-            int: the vectors' cross product
+            float: the vectors' cross product
         """
         if isinstance(other, Vector):
-            return np.cross(self.value, other.value)
+            return self._x*other._y - self._y*other._x
         else:
             return NotImplemented
 
@@ -129,7 +191,7 @@ class Vector:
             bool: a boolean describing equality
         """
         if isinstance(other, Vector):
-            return np.array_equal(self.value, other.value, equal_nan=False)
+            return self._x == other._x and self._y == other._y
         else:
             return NotImplemented
     # region Overrides
@@ -138,45 +200,85 @@ class Vector:
         """A function to add vectors
 
         Args:
-            other (Vector): the vector to operate with
+            other (Vector OR np.ndarray): the vector to operate with
+
+        Returns:
+            Vector: the operated vector
+        """
+        if isinstance(other, Vector):
+            return Vector.from_xy(self._x + other._x, self._y + other._y)
+        elif isinstance(other, np.ndarray):
+            return Vector.from_xy(self._x + float(other[0]),
+                                  self._y + float(other[1]))
+        else:
+            return NotImplemented
+
+    def __iadd__(self, other):
+        """A function to add a vector in place
+
+        Args:
+            other (Vector OR np.ndarray): the vector to operate with
 
         Returns:
             Vector: the operated vector
         """
-        if isinstance(other, np.ndarray):
-            return Vector(self.value + other)
-        elif isinstance(other, Vector):
-            return Vector(self + other.value)
+        if isinstance(other, Vector):
+            self._x += other._x
+            self._y += other._y
+        elif isinstance(other, np.ndarray):
+            self._x += float(other[0])
+            self._y += float(other[1])
         else:
             return NotImplemented
+        return self
 
     def __sub__(self, other):
         """A function to subtract vectors
 
         Args:
-            other (Vector): the vector to operate with
+            other (Vector OR np.ndarray): the vector to operate with
+
+        Returns:
+            Vector: the operated vector
+        """
+        if isinstance(other, Vector):
+            return Vector.from_xy(self._x - other._x, self._y - other._y)
+        elif isinstance(other, np.ndarray):
+            return Vector.from_xy(self._x - float(other[0]),
+                                  self._y - float(other[1]))
+        else:
+            return NotImplemented
+
+    def __isub__(self, other):
+        """A function to subtract a vector in place
+
+        Args:
+            other (Vector OR np.ndarray): the vector to operate with
 
         Returns:
             Vector: the operated vector
         """
-        if isinstance(other, np.ndarray):
-            return Vector(self.value - other)
-        elif isinstance(other, Vector):
-            return Vector(self - other.value)
+        if isinstance(other, Vector):
+            self._x -= other._x
+            self._y -= other._y
+        elif isinstance(other, np.ndarray):
+            self._x -= float(other[0])
+            self._y -= float(other[1])
         else:
             return NotImplemented
+        return self
 
     def __mul__(self, other):
         """A function to multiply vectors
 
         Args:
-            other (Vector): the vector to operate with
+            other (int OR float): the scalar to operate with
 
         Returns:
             Vector: the operated vector
         """
-        if isinstance(other, int) or isinstance(other, float):
-            return Vector(self.value * other)
+        if isinstance(other, (int, float)):
+            return Vector.from_xy(self._x * other, self._y * other)
         else:
             return NotImplemented
 
@@ -184,27 +286,40 @@ class Vector:
         """A function to reverse multiply vectors
 
         Args:
-            other (Vector): the vector to operate with
+            other (int OR float): the scalar to operate with
 
         Returns:
             Vector: the operated vector
         """
-        if isinstance(other, int) or isinstance(other, float):
-            return Vector(self.value * other)
+        return self.__mul__(other)
+
+    def __imul__(self, other):
+        """A function to multiply a vector in place
+
+        Args:
+            other (int OR float): the scalar to operate with
+
+        Returns:
+            Vector: the operated vector
+        """
+        if isinstance(other, (int, float)):
+            self._x *= other
+            self._y *= other
         else:
             return NotImplemented
+        return self
 
     def __truediv__(self, other):
         """A function to divide vectors
 
         Args:
-            other (Vector): the vector to operate with
+            other (int OR float): the scalar to operate with
 
         Returns:
             Vector: the operated vector
         """
-        if isinstance(other, int) or isinstance(other, float):
-            return Vector(self.value / other)
+        if isinstance(other, (int, float)):
+            return Vector.from_xy(self._x / other, self._y / other)
         else:
             return NotImplemented
 
@@ -222,5 +337,5 @@ class Vector:
         Returns:
             String: a string representation
         """
-        return f'(x:{self.value[0]:.5f} y:{self.value[1]:.5f})'
+        return f'(x:{self._x:.5f} y:{self._y:.5f})'
     # endregion
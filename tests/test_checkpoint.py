@@ -0,0 +1,66 @@
+"""
+# test_checkpoint.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file tests that populations resumed from a checkpoint
+#   evolve exactly as if they had never stopped.
+"""
+
+import numpy as np
+import pytest
+
+from pathfinder.checkpoint import Checkpointer
+from pathfinder.maps import MAPS, START_POSITION
+from pathfinder.population import Population
+from pathfinder.store import GenomeStore
+
+
+# the settings a checkpoint does not keep, given again on load
+SETTINGS = {"elite": 2, "chunk_size": 50}
+
+
+def make_population(directory=None):
+    """A function to make a small seeded population
+
+    Args:
+        directory (str, optional): a directory to keep the genomes in a
+            store under. Defaults to None, keeping them in memory.
+
+    Returns:
+        Population: the population
+    """
+    store = None
+    if directory is not None:
+        store = GenomeStore.create(str(directory / "store"), 150, 80,
+                                   rng=np.random.default_rng(4))
+    return Population(150, 80, START_POSITION, seed=4, store=store,
+                      **SETTINGS)
+
+
+@pytest.mark.parametrize("stored", [False, True], ids=["memory", "store"])
+def test_resumed_run_matches(tmp_path, stored):
+    environment = MAPS["swerve"]()
+    path = str(tmp_path / "checkpoint.npz")
+    uninterrupted = make_population(tmp_path / "a" if stored else None)
+    uninterrupted.run_generations(6, environment)
+    stopped = make_population(tmp_path / "b" if stored else None)
+    stopped.run_generations(3, environment)
+    stopped.save(path)
+    # the run goes on after the checkpoint, which must not change it
+    stopped.run_generations(2, environment)
+    resumed = Population.load(path, **SETTINGS)
+    assert resumed.generation == 3
+    resumed.run_generations(3, environment)
+    assert resumed.fitness_history == uninterrupted.fitness_history
+    assert np.array_equal(resumed.genomes, uninterrupted.genomes)
+
+
+def test_checkpointer_writes_in_background(tmp_path):
+    environment = MAPS["swerve"]()
+    path = str(tmp_path / "checkpoint.npz")
+    population = make_population(tmp_path)
+    with Checkpointer(path, every=2) as checkpointer:
+        population.run_generations(4, environment, callback=checkpointer)
+    resumed = Population.load(path, **SETTINGS)
+    assert resumed.generation == 4
+    assert resumed.fitness_history == population.fitness_history
@@ -0,0 +1,74 @@
+"""
+# test_collision.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file tests that collision through the wall grid finds
+#   the same crashes as testing every wall.
+"""
+
+import numpy as np
+import pytest
+
+from pathfinder.environment import Border, Environment, Target, Wall
+from pathfinder.maps import MAPS
+from pathfinder.spatial import WallGrid
+from pathfinder.vector import Vector
+
+
+def random_environment(walls, seed=0):
+    """A function to make an environment full of random walls
+
+    Args:
+        walls (int): the number of walls
+        seed (int, optional): the seed to draw from. Defaults to 0.
+
+    Returns:
+        Environment: the environment
+    """
+    rng = np.random.default_rng(seed)
+    starts = rng.uniform(20, 480, (walls, 2))
+    vectors = rng.uniform(-60, 60, (walls, 2))
+    return Environment(
+        border=Border(Vector([20, 20]), Vector([480, 480])),
+        target=Target(Vector([450, 250])),
+        walls=[Wall(Vector(start), Vector(vector))
+               for start, vector in zip(starts, vectors)])
+
+
+def random_movements(count, seed=1):
+    """A function to make movements of many lengths across the area
+
+    Args:
+        count (int): the number of movements
+        seed (int, optional): the seed to draw from. Defaults to 1.
+
+    Returns:
+        tuple: the (count, 2) positions and velocities
+    """
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(0, 500, (count, 2))
+    velocities = rng.normal(0, 1, (count, 2)) * rng.choice(
+        [1, 10, 100], (count, 1))
+    return positions, velocities
+
+
+@pytest.mark.parametrize("environment", [
+    random_environment(200), random_environment(20, seed=5),
+    *(make() for make in MAPS.values())
+], ids=["200_walls", "20_walls", *MAPS])
+def test_grid_matches_dense(environment):
+    positions, velocities = random_movements(5000)
+    dense = environment.test_collision_dense(positions, velocities)
+    assert dense.any()
+    assert np.array_equal(
+        environment.test_collision_grid(positions, velocities), dense)
+
+
+@pytest.mark.parametrize("cells_per_side", [1, 3, 16, 256])
+def test_grid_size_does_not_matter(cells_per_side):
+    environment = random_environment(100, seed=2)
+    positions, velocities = random_movements(2000, seed=3)
+    dense = environment.test_collision_dense(positions, velocities)
+    environment.grid = WallGrid(environment.wall_matrix, cells_per_side)
+    assert np.array_equal(
+        environment.test_collision_grid(positions, velocities), dense)
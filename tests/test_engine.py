@@ -0,0 +1,82 @@
+"""
+# test_engine.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file tests the batch engine against the finders' own
+#   scalar update on every map, and that the caches and
+#   chunking leave seeded runs unchanged.
+"""
+
+import numpy as np
+import pytest
+
+from pathfinder.cache import FitnessCache, TrajectoryCache
+from pathfinder.chromosome import Chromosome
+from pathfinder.engine import Engine
+from pathfinder.finder import Finder
+from pathfinder.maps import MAPS, START_POSITION
+from pathfinder.population import Population
+
+
+def random_genomes(size, lifespan, seed=0):
+    """A function to make genomes that crash, complete and run out
+
+    Args:
+        size (int): the number of genomes
+        lifespan (int): the number of steps in each genome
+        seed (int, optional): the seed to draw from. Defaults to 0.
+
+    Returns:
+        np.ndarray: a (size, lifespan, 2) genome matrix
+    """
+    rng = np.random.default_rng(seed)
+    genomes = rng.uniform(-1, 1, (size, lifespan, 2))
+    # push half of them towards the target so some get there
+    genomes[::2, :, 0] += 0.2
+    return genomes
+
+
+@pytest.mark.parametrize("name", sorted(MAPS))
+def test_engine_matches_scalar_finders(name):
+    environment = MAPS[name]()
+    genomes = random_genomes(64, 120)
+    engine = Engine(genomes, START_POSITION)
+    engine.run(environment)
+    fitness = engine.calculate_fitness(environment)
+    for row, genome in enumerate(genomes):
+        finder = Finder(Chromosome(genes=genome),
+                        start_position=START_POSITION)
+        while not (finder.crashed or finder.completed):
+            finder.update(None, environment)
+        assert np.allclose(finder.engine.positions[0], engine.positions[row])
+        assert finder.alive_duration == engine.alive_durations[row]
+        assert finder.crashed == engine.crashed[row]
+        assert finder.completed == engine.completed[row]
+        assert finder.calculate_fitness(environment) == pytest.approx(
+            fitness[row])
+
+
+def run_history(environment, **kwargs):
+    """A function to run a small seeded population
+
+    Args:
+        environment (Environment): the environment to run in
+        **kwargs: the population options being tested
+
+    Returns:
+        list: the (average, best) fitness of each generation
+    """
+    population = Population(120, 80, START_POSITION, seed=7, elite=3,
+                            **kwargs)
+    return population.run_generations(6, environment)
+
+
+@pytest.mark.parametrize("name", sorted(MAPS))
+@pytest.mark.parametrize("options", [
+    lambda: {"trajectories": TrajectoryCache(every=10)},
+    lambda: {"fitness_cache": FitnessCache()},
+    lambda: {"chunk_size": 50},
+], ids=["trajectories", "fitness_cache", "chunks"])
+def test_seeded_runs_match(name, options):
+    environment = MAPS[name]()
+    assert run_history(environment, **options()) == run_history(environment)
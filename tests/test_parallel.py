@@ -0,0 +1,55 @@
+"""
+# test_parallel.py - CS481-GA-PATHFINDER
+# Martin Miglio
+#
+# This file tests that evaluating in worker processes gives
+#   the same seeded runs as evaluating in process.
+"""
+
+import numpy as np
+import pytest
+
+from pathfinder.maps import MAPS, START_POSITION
+from pathfinder.parallel import ParallelEvaluator
+from pathfinder.population import Population
+from pathfinder.store import GenomeStore
+
+
+@pytest.fixture(scope="module")
+def environment():
+    return MAPS["swerve"]()
+
+
+@pytest.fixture(scope="module")
+def evaluator(environment):
+    with ParallelEvaluator(environment, workers=2) as evaluator:
+        yield evaluator
+
+
+def test_seeded_runs_match(environment, evaluator):
+    parallel = Population(200, 80, START_POSITION, seed=5, elite=3,
+                          evaluator=evaluator)
+    serial = Population(200, 80, START_POSITION, seed=5, elite=3)
+    assert parallel.run_generations(4, environment) \
+        == serial.run_generations(4, environment)
+
+
+def test_store_genomes_match(tmp_path, environment, evaluator):
+    store = GenomeStore.create(str(tmp_path), 200, 80,
+                               rng=np.random.default_rng(6))
+    genomes = np.array(store.current, dtype=float)
+    population = Population(200, 80, START_POSITION, genomes=genomes)
+    expected = population.simulate(genomes, environment)
+    assert np.array_equal(
+        evaluator.evaluate(store.current, START_POSITION), expected)
+
+
+def test_min_alive_fraction_is_passed(environment):
+    # one worker runs the whole generation as a single shard
+    with ParallelEvaluator(environment, workers=1) as evaluator:
+        parallel = Population(200, 80, START_POSITION, seed=5,
+                              min_alive_fraction=0.5, evaluator=evaluator)
+        history = parallel.run_generations(2, environment)
+    serial = Population(200, 80, START_POSITION, seed=5,
+                        min_alive_fraction=0.5, chunk_size=200)
+    assert history == serial.run_generations(2, environment)